@@ -0,0 +1,166 @@
+
+import json
+from collections import defaultdict
+from functools import wraps
+from time import perf_counter
+from weakref import WeakKeyDictionary
+
+from my_planning_graph import ActionLayer, LiteralLayer, PlanningGraph
+
+# methods timed by the profiler, grouped by the class they are patched on
+_HEURISTICS = ["h_levelsum", "h_maxlevel", "h_setlevel"]
+_TIMED_METHODS = [
+    (PlanningGraph, ["_extend"] + _HEURISTICS),
+    (ActionLayer, ["update_mutexes", "_inconsistent_effects", "_interference", "_competing_needs"]),
+    (LiteralLayer, ["update_mutexes", "_inconsistent_support", "_negation"]),
+]
+
+
+def _count_mutex_pairs(layer):
+    # mutexes are stored in both directions, see layers.BaseLayer.set_mutex
+    return sum(len(items) for items in layer._mutexes.values()) // 2
+
+
+class GraphProfiler:
+    """ Opt-in instrumentation of the planning graph
+
+    While the profiler is active the graph extension, the mutex updates, every
+    mutex test and the heuristics are timed, and the size of every new level
+    is recorded. The instrumentation is removed again when the profiler exits,
+    so there is no overhead outside of the `with` block.
+
+    Example
+    -------
+        with GraphProfiler() as profiler:
+            PlanningGraph(problem, state).h_levelsum()
+        print(profiler.format_report())
+        profiler.write_folded("levelsum.folded")  # input for flamegraph.pl
+
+    Attributes
+    ----------
+    graphs : list(dict)
+        One entry per profiled graph with the per-level sizes ("levels") and
+        whether the graph leveled off
+
+    calls, seconds : dict
+        Number of calls and inclusive wall time per "Class.method" label
+    """
+
+    def __init__(self):
+        self.graphs = []
+        self.calls = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self._graph_stats_of = WeakKeyDictionary()
+        self._stack = []
+        self._stack_seconds = defaultdict(float)
+        self._originals = []
+
+    def __enter__(self):
+        for cls, names in _TIMED_METHODS:
+            for name in names:
+                # remember whether the method was inherited so __exit__ can restore the lookup
+                self._originals.append((cls, name, cls.__dict__.get(name)))
+                label = "{}.{}".format(cls.__name__, name)
+                timed = self._timed(label, getattr(cls, name))
+                if name == "_extend":
+                    timed = self._record_levels(timed)
+                setattr(cls, name, timed)
+        return self
+
+    def __exit__(self, *exc_info):
+        for cls, name, original in reversed(self._originals):
+            if original is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, original)
+        self._originals = []
+
+    def _timed(self, label, func):
+        @wraps(func)
+        def timed(*args, **kwargs):
+            self._stack.append(label)
+            stack = tuple(self._stack)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                self._stack.pop()
+                self.calls[label] += 1
+                self.seconds[label] += elapsed
+                self._stack_seconds[stack] += elapsed
+        return timed
+
+    def _record_levels(self, extend):
+        @wraps(extend)
+        def record(graph):
+            stats = self._graph_stats(graph)
+            levels = len(graph.literal_layers)
+            extend(graph)
+            if len(graph.literal_layers) > levels:
+                stats["levels"].append(self._level_stats(graph, len(graph.literal_layers) - 1))
+            stats["leveled"] = graph._is_leveled
+        return record
+
+    def _graph_stats(self, graph):
+        if graph not in self._graph_stats_of:
+            # the first literal layer is built in the constructor, so record it on first sight
+            self._graph_stats_of[graph] = {"levels": [self._level_stats(graph, 0)], "leveled": graph._is_leveled}
+            self.graphs.append(self._graph_stats_of[graph])
+        return self._graph_stats_of[graph]
+
+    @staticmethod
+    def _level_stats(graph, level):
+        literal_layer = graph.literal_layers[level]
+        action_layer = graph.action_layers[level - 1] if level > 0 else None
+        return {
+            "level": level,
+            "literals": len(literal_layer),
+            "literal_mutexes": _count_mutex_pairs(literal_layer),
+            "actions": len(action_layer) if action_layer is not None else 0,
+            "action_mutexes": _count_mutex_pairs(action_layer) if action_layer is not None else 0,
+        }
+
+    def report(self):
+        """ Return the collected statistics as a JSON serializable dict """
+        return {
+            "graphs": self.graphs,
+            "functions": {label: {"calls": self.calls[label], "seconds": self.seconds[label]}
+                          for label in sorted(self.seconds, key=self.seconds.get, reverse=True)},
+        }
+
+    def format_report(self):
+        """ Return a human readable summary of the collected statistics """
+        lines = ["{:<36}{:>10}{:>12}".format("function", "calls", "ms")]
+        for label, stats in self.report()["functions"].items():
+            lines.append("{:<36}{:>10}{:>12.2f}".format(label, stats["calls"], stats["seconds"] * 1000))
+
+        for index, graph in enumerate(self.graphs):
+            lines.append("")
+            lines.append("graph {} ({})".format(index, "leveled" if graph["leveled"] else "not leveled"))
+            lines.append("{:>7}{:>10}{:>10}{:>10}{:>10}".format(
+                "level", "literals", "mutexes", "actions", "mutexes"))
+            for level in graph["levels"]:
+                lines.append("{level:>7}{literals:>10}{literal_mutexes:>10}{actions:>10}{action_mutexes:>10}"
+                             .format(**level))
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def folded_stacks(self):
+        """ Return the self time of every call stack in the "folded" format
+        understood by flamegraph.pl and speedscope (one "a;b;c microseconds"
+        line per stack)
+        """
+        self_seconds = dict(self._stack_seconds)
+        for stack, elapsed in self._stack_seconds.items():
+            if len(stack) > 1:
+                self_seconds[stack[:-1]] = self_seconds.get(stack[:-1], 0.) - elapsed
+        return ["{} {}".format(";".join(stack), max(0, round(elapsed * 1e6)))
+                for stack, elapsed in sorted(self_seconds.items())]
+
+    def write_folded(self, path):
+        with open(path, "w") as f:
+            f.write("\n".join(self.folded_stacks()) + "\n")
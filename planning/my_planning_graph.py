@@ -6,8 +6,44 @@ from aimacode.utils import expr
 from layers import BaseActionLayer, BaseLiteralLayer, makeNoOp, make_node
 
 
+def make_action_nodes(problem):
+    """ Return the no-op actions that persist every literal to the next layer
+    followed by the action nodes of the problem
+    """
+    no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
+    return no_ops + [make_node(a) for a in problem.actions_list]
+
+
+def find_static_mutexes(action_nodes):
+    """ Return the action pairs that are mutex on every level of a planning graph
+
+    Inconsistent effects and interference only depend on the actions themselves,
+    so these pairs can be computed once per problem and shared between graphs.
+    The result is a pair of sets, the pairs with inconsistent effects and the
+    pairs that interfere; each pair is stored in both orders to allow a plain
+    tuple lookup.
+    """
+    layer = ActionLayer()
+    inconsistent_effects = set()
+    interference = set()
+    for actionA, actionB in combinations(action_nodes, 2):
+        if layer._inconsistent_effects(actionA, actionB):
+            inconsistent_effects.update(((actionA, actionB), (actionB, actionA)))
+        if layer._interference(actionA, actionB):
+            interference.update(((actionA, actionB), (actionB, actionA)))
+    return frozenset(inconsistent_effects), frozenset(interference)
+
+
 class ActionLayer(BaseActionLayer):
 
+    def __init__(self, *args, static_mutexes=None, **kwargs):
+        """ static_mutexes is the pair of sets returned by find_static_mutexes()
+        for the actions of the layer; when it is given the inconsistent effects
+        and interference tests are lookups instead of comparisons of the effects
+        """
+        super().__init__(*args, **kwargs)
+        self.static_mutexes = static_mutexes
+
     def _inconsistent_effects(self, actionA, actionB):
         """ Return True if an effect of one action negates an effect of the other
 
@@ -20,7 +56,9 @@ class ActionLayer(BaseActionLayer):
         layers.ActionNode
         """
         # TODO: implement this function
-        
+        if self.static_mutexes is not None:
+            return (actionA, actionB) in self.static_mutexes[0]
+
         for effect in actionA.effects:
             if ~effect in actionB.effects:
                 return True
@@ -44,7 +82,9 @@ class ActionLayer(BaseActionLayer):
         layers.ActionNode
         """
         # TODO: implement this function
-        
+        if self.static_mutexes is not None:
+            return (actionA, actionB) in self.static_mutexes[1]
+
         for effect in actionA.effects:
             if ~effect in actionB.preconditions:
                 return True
@@ -118,7 +158,8 @@ class LiteralLayer(BaseLiteralLayer):
 
 
 class PlanningGraph:
-    def __init__(self, problem, state, serialize=True, ignore_mutexes=False):
+    def __init__(self, problem, state, serialize=True, ignore_mutexes=False, action_nodes=None,
+                 static_mutexes=None):
         """
         Parameters
         ----------
@@ -134,16 +175,23 @@ class PlanningGraph:
             should NOT be serialized for regression search (e.g., GraphPlan), and
             _should_ be serialized if the planning graph is being used to estimate
             a heuristic
+
+        action_nodes : list(ActionNode), optional
+            The no-op and problem action nodes created by make_action_nodes(problem).
+            Passing them in avoids rebuilding them for every graph of the same problem
+
+        static_mutexes : tuple(frozenset, frozenset), optional
+            The result of find_static_mutexes(action_nodes), used by every action
+            layer of this graph for the inconsistent effects and interference tests
         """
         self._serialize = serialize
         self._is_leveled = False
         self._ignore_mutexes = ignore_mutexes
+        self._static_mutexes = static_mutexes
         self.goal = set(problem.goal)
 
-        # make no-op actions that persist every literal to the next layer
-        no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
-        self._actionNodes = no_ops + [make_node(a) for a in problem.actions_list]
-        
+        self._actionNodes = action_nodes if action_nodes is not None else make_action_nodes(problem)
+
         # initialize the planning graph by finding the literals that are in the
         # first layer and finding the actions they they should be connected to
         literals = [s if f else ~s for f, s in zip(state, problem.state_map)]
@@ -312,7 +360,8 @@ class PlanningGraph:
 
         parent_literals = self.literal_layers[-1]
         parent_actions = parent_literals.parent_layer
-        action_layer = ActionLayer(parent_actions, parent_literals, self._serialize, self._ignore_mutexes)
+        action_layer = ActionLayer(parent_actions, parent_literals, self._serialize, self._ignore_mutexes,
+                                   static_mutexes=self._static_mutexes)
         literal_layer = LiteralLayer(parent_literals, action_layer, self._ignore_mutexes)
 
         for action in self._actionNodes:
@@ -0,0 +1,92 @@
+
+from multiprocessing import Pool, cpu_count
+
+from my_planning_graph import PlanningGraph, find_static_mutexes, make_action_nodes
+
+# static problem structure of the worker process, assigned once by _init_worker()
+_problem = None
+_action_nodes = None
+_static_mutexes = None
+_heuristic = None
+_serialize = True
+_ignore_mutexes = False
+
+
+def _init_worker(problem, action_nodes, static_mutexes, heuristic, serialize, ignore_mutexes):
+    """ Store the static problem structure in the worker so that it is
+    transferred once per worker instead of once per evaluated state
+    """
+    global _problem, _action_nodes, _static_mutexes, _heuristic, _serialize, _ignore_mutexes
+    _problem = problem
+    _action_nodes = action_nodes
+    _static_mutexes = static_mutexes
+    _heuristic = heuristic
+    _serialize = serialize
+    _ignore_mutexes = ignore_mutexes
+
+
+def _evaluate(state):
+    graph = PlanningGraph(_problem, state, _serialize, _ignore_mutexes, action_nodes=_action_nodes,
+                          static_mutexes=_static_mutexes)
+    return getattr(graph, _heuristic)()
+
+
+class BatchHeuristic:
+    """ Evaluate a planning graph heuristic for many states in a process pool
+
+    The action nodes and the static action mutexes of the problem are built
+    once and handed to every worker when the pool starts, so each call only
+    sends the states themselves (tuples of bools) to the workers.
+
+    Example
+    -------
+        with BatchHeuristic(problem, "h_levelsum") as heuristic:
+            values = heuristic.evaluate([child.state for child in children])
+    """
+
+    def __init__(self, problem, heuristic="h_levelsum", processes=None, serialize=True, ignore_mutexes=False):
+        """
+        Parameters
+        ----------
+        problem : PlanningProblem
+            An instance of the PlanningProblem class
+
+        heuristic : str
+            Name of the PlanningGraph heuristic method, e.g. "h_levelsum",
+            "h_maxlevel" or "h_setlevel"
+
+        processes : int, optional
+            Number of worker processes (defaults to the number of cores)
+
+        serialize, ignore_mutexes : bool
+            Passed to every PlanningGraph (see PlanningGraph.__init__)
+        """
+        if not callable(getattr(PlanningGraph, heuristic, None)):
+            raise ValueError("Unknown planning graph heuristic: {}".format(heuristic))
+
+        self.processes = processes or cpu_count()
+        action_nodes = make_action_nodes(problem)
+        static_mutexes = find_static_mutexes(action_nodes)
+        self._pool = Pool(self.processes, initializer=_init_worker,
+                          initargs=(problem, action_nodes, static_mutexes, heuristic, serialize, ignore_mutexes))
+
+    def evaluate(self, states, chunksize=None):
+        """ Return the heuristic value of each state, in the order of the states """
+        states = list(states)
+        if not states:
+            return []
+        if chunksize is None:
+            # a few chunks per worker keeps the load balanced without
+            # paying the inter-process overhead for every single state
+            chunksize = max(1, len(states) // (4 * self.processes))
+        return self._pool.map(_evaluate, states, chunksize)
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
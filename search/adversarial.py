@@ -0,0 +1,247 @@
+# Alpha-beta search engine shared by the search exercises and CustomPlayer.
+#
+# The search is a negamax: every node returns its value for the player to
+# move, so max and min nodes are the same code. Heuristic values still come
+# from the point of view of one searching player (evaluators need not be
+# zero-sum, like the my_moves score of the depth-limit quiz) and are negated
+# at the nodes of the opponent; the values returned by search() and value()
+# are for the searching player, exactly as a min/max search would return
+# them.
+#
+# Everything that speeds the search up is an optional part of the engine:
+# a TranspositionTable, a MoveOrdering, principal variation search and a
+# deadline. Without them it visits the nodes of a textbook minimax (with or
+# without alpha-beta pruning) in the order of state.actions().
+
+import time
+
+# width of the null window of the principal variation search, any positive
+# value is correct with the fail-soft search, a smaller one cuts more
+_NULL_WINDOW = 1e-3
+_NODES_BETWEEN_TIME_CHECKS = 64
+
+
+def state_key(gameState):
+    """ Return a hash of a quiz position for the transposition table, the
+    zobrist key of a BitboardGameState or a hash of a GameState's fields
+    """
+    if hasattr(gameState, "zobrist"):  # BitboardGameState
+        return gameState.zobrist
+    return hash((tuple(map(tuple, gameState._board)), tuple(gameState._player_locations), gameState._parity))
+
+
+class SearchTimeout(Exception):
+    """ Raised inside the search when the deadline has passed """
+
+
+class AlphaBetaSearch:
+    """ Depth limited negamax search with alpha-beta pruning
+
+    player_id
+        the searching player; values are from its point of view
+    evaluator
+        evaluator(state) scores a non-terminal state at the depth limit for
+        player_id; not needed for searches to the end of the game
+    table
+        a TranspositionTable, or None; its values are only valid for one
+        player_id and evaluator
+    ordering
+        an object with order(state, actions, ply, hash_moves) and
+        record_cutoff(state, action, ply, depth, index) like MoveOrdering,
+        or None to search the hash moves first and the others in the order
+        of state.actions()
+    key
+        key(state) is the transposition table key of a state
+    pruning
+        False searches every node (plain minimax)
+    pvs
+        True searches all moves but the first with a null window first
+    deadline
+        time.perf_counter() value after which SearchTimeout is raised, or None
+    time_check_interval
+        the deadline is checked every time_check_interval nodes; 1 keeps the
+        overshoot to a single node, larger values save the clock calls
+
+        engine = AlphaBetaSearch(player_id, evaluator, TranspositionTable())
+        action = engine.search(state, depth)
+        value = engine.last_score
+    """
+
+    def __init__(self, player_id, evaluator=None, table=None, ordering=None, key=hash, pruning=True, pvs=False,
+                 deadline=None, time_check_interval=_NODES_BETWEEN_TIME_CHECKS):
+        self.player_id = player_id
+        self.evaluator = evaluator
+        self.table = table
+        self.ordering = ordering
+        self.key = key
+        self.pruning = pruning
+        self.pvs = pvs
+        self.deadline = deadline
+        self.time_check_interval = time_check_interval
+        self.last_score = 0
+        self.nodes = 0
+        self.evaluations = 0
+        self.researches = 0
+        # moves of the principal variation of the previous depth, searched first
+        self.pv_moves = {}
+
+    def new_search(self):
+        """ Reset the counters and age the table and the move ordering, call before every move """
+        if self.table is not None:
+            self.table.new_search()
+        if self.ordering is not None:
+            self.ordering.new_search()
+        self.reset_stats()
+        self.pv_moves = {}
+
+    def reset_stats(self):
+        """ Reset the counters returned by stats() """
+        self.nodes = 0
+        self.evaluations = 0
+        self.researches = 0
+
+    def search(self, state, depth=float("inf"), alpha=float("-inf"), beta=float("inf")):
+        """ Return the best move of player_id, which has to be the player to
+        move in the state, with the search depth limit, or None in a terminal
+        state; its value is kept in self.last_score
+
+        With pruning the search stops at the first move that reaches beta,
+        so with a finite window the move is only reliable if
+        alpha < self.last_score < beta.
+        """
+        window = (alpha, beta)
+        best_score = float("-inf")
+        best_move = None
+        for index, a in enumerate(self.order(state, None, 0)):
+            v = self._search_child(state.result(a), index, alpha, beta, depth - 1, 1)
+            if best_move is None or v > best_score:
+                best_score = v
+                best_move = a
+            if self.pruning:
+                if v >= beta:
+                    break
+                alpha = max(alpha, v)
+
+        if self.table is not None and best_move is not None:
+            self.table.store(self.key(state), depth, best_score, window[0], window[1], best_move)
+        self.last_score = best_score
+        return best_move
+
+    def value(self, state, depth=float("inf"), alpha=float("-inf"), beta=float("inf")):
+        """ Return the value of the state for player_id, searched depth plies deep """
+        if state.player() == self.player_id:
+            return self._negamax(state, depth, alpha, beta)
+        return -self._negamax(state, depth, -beta, -alpha)
+
+    def order(self, state, move=None, ply=0):
+        """ Return the legal actions with the move of the previous principal
+        variation first, followed by the best move stored for the state (or
+        the given move) and the rest as ordered by self.ordering
+        """
+        actions = state.actions()
+        if self.table is None and not self.pv_moves:
+            hash_moves = (move,)
+        else:
+            key = self.key(state)
+            if move is None and self.table is not None:
+                entry = self.table.lookup(key)
+                move = entry.move if entry else None
+            hash_moves = (self.pv_moves.get(key), move)
+
+        if self.ordering is not None:
+            return self.ordering.order(state, actions, ply, hash_moves)
+        for move in reversed(hash_moves):
+            if move in actions:
+                actions.remove(move)
+                actions.insert(0, move)
+        return actions
+
+    def principal_variation(self, state, depth):
+        """ Return the line of best moves stored in the transposition table
+        and remember its positions for the move ordering of the next depth
+        """
+        self.pv_moves = {}
+        moves = []
+        if self.table is None:
+            return moves
+        for _ in range(depth):
+            key = self.key(state)
+            entry = self.table.lookup(key)
+            if entry is None or entry.move not in state.actions():
+                break
+            self.pv_moves[key] = entry.move
+            moves.append(entry.move)
+            state = state.result(entry.move)
+        return moves
+
+    def _count_node(self):
+        """ Count a searched node and abort the search once the deadline passed """
+        self.nodes += 1
+        if (self.deadline is not None and self.nodes % self.time_check_interval == 0
+                and time.perf_counter() > self.deadline):
+            raise SearchTimeout()
+
+    def _search_child(self, child_state, index, alpha, beta, depth, ply):
+        """ Return the value of the index-th child for the player to move in the parent
+
+        The first child is searched with the full window. With pvs every
+        later one is expected to be worse than the best so far: a null
+        window search proves that cheaply, only a child that turns out to
+        lie inside the window is searched again with the full window.
+        """
+        if not self.pvs or index == 0 or beta - alpha <= _NULL_WINDOW or alpha == float("-inf"):
+            return -self._negamax(child_state, depth, -beta, -alpha, ply)
+
+        v = -self._negamax(child_state, depth, -alpha - _NULL_WINDOW, -alpha, ply)
+        if alpha < v < beta:
+            self.researches += 1
+            v = -self._negamax(child_state, depth, -beta, -alpha, ply)
+        return v
+
+    def _negamax(self, state, depth, alpha, beta, ply=0):
+        """ Return the value of the state for the player to move, ply
+        moves below the root of the search
+        """
+        self._count_node()
+        sign = 1 if state.player() == self.player_id else -1
+        if state.terminal_test():
+            return sign * state.utility(self.player_id)
+
+        if depth <= 0:
+            self.evaluations += 1
+            return sign * self.evaluator(state)
+
+        move = None
+        if self.table is not None:
+            key = self.key(state)
+            value, alpha, beta, move = self.table.probe(key, depth, alpha, beta)
+            if value is not None:
+                return value
+            window = (alpha, beta)
+
+        v = float("-inf")
+        best_move = None
+
+        for index, a in enumerate(self.order(state, move, ply)):
+            child_value = self._search_child(state.result(a), index, alpha, beta, depth - 1, ply + 1)
+            if best_move is None or child_value > v:
+                v = child_value
+                best_move = a
+            if self.pruning:
+                if v >= beta:
+                    if self.ordering is not None:
+                        self.ordering.record_cutoff(state, a, ply, depth, index)
+                    break
+                alpha = max(alpha, v)
+
+        if self.table is not None:
+            self.table.store(key, depth, v, window[0], window[1], best_move)
+        return v
+
+    def stats(self):
+        """ Return the counters of the searches since new_search() """
+        return {
+            "nodes": self.nodes,
+            "evaluations": self.evaluations,
+            "pvs_researches": self.researches,
+        }
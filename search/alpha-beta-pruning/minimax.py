@@ -1,4 +1,12 @@
-def alpha_beta_search(gameState):
+import os
+import sys
+
+# the search engine is shared with the other search exercises
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from adversarial import AlphaBetaSearch, state_key
+
+
+def alpha_beta_search(gameState, table=None, solution=None):
     """ Return the move along a branch of the game tree that
     has the best possible value.  A move is a pair of coordinates
     in (column, row) order corresponding to a legal move for
@@ -6,58 +14,26 @@ def alpha_beta_search(gameState):
 
     You can ignore the special case of calling this function
     from a terminal state.
+
+    Pass a TranspositionTable to reuse the values of positions that
+    are reached by different move orders, it stores the values for the
+    player to move. Every search runs to the end of the game, so the
+    depth is unlimited.
+
+    Pass a SolvedGame to play a solved board perfectly by looking the
+    move up instead of searching.
     """
+    if solution is not None:
+        return solution.best_action(gameState)
+    engine = AlphaBetaSearch(gameState.player(), table=table, key=state_key)
     alpha = float("-inf")
-    beta = float("inf")
     best_score = float("-inf")
     best_move = None
-    for a in gameState.actions():
-        v = min_value(gameState.result(a), alpha, beta)
+    for a in engine.order(gameState):
+        v = engine.value(gameState.result(a), alpha=alpha)
         alpha = max(alpha, v)
 
         if v > best_score:
             best_score = v
             best_move = a
     return best_move
-
-
-def min_value(gameState, alpha, beta):
-    """ Return the value for a win (+1) if the game is over,
-    otherwise return the minimum value over all legal child
-    nodes.
-    """
-    if gameState.terminal_test():
-        return gameState.utility(0)
-
-    v = float("inf")
-
-    for a in gameState.actions():
-        v = min(v, max_value(gameState.result(a), alpha, beta))
-
-        if v <= alpha:
-            return v
-
-        beta = min(beta, v)
-
-    return v
-
-
-def max_value(gameState, alpha, beta):
-    """ Return the value for a loss (-1) if the game is over,
-    otherwise return the maximum value over all legal child
-    nodes.
-    """
-    if gameState.terminal_test():
-        return gameState.utility(0)
-
-    v = float("-inf")
-
-    for a in gameState.actions():
-        v = max(v, min_value(gameState.result(a), alpha, beta))
-
-        if v >= beta:
-            return v
-
-        alpha = max(alpha, v)
-
-    return v
@@ -0,0 +1,20 @@
+
+import minimax
+import gamestate as game
+
+
+# The bitboard game state is a drop-in replacement for GameState: the
+# search has to visit the same number of nodes and return the same move
+# on both of them
+expected_node_count = 55
+move = minimax.alpha_beta_search(game.GameState())
+game.call_counter = 0
+bitboard_move = minimax.alpha_beta_search(game.BitboardGameState())
+
+print("Expected node count: {}".format(expected_node_count))
+print("Your bitboard node count: {}".format(game.call_counter))
+
+if game.call_counter == expected_node_count and bitboard_move == move:
+    print("That's right! The bitboard state works with your alpha-beta search!")
+else:
+    print("Uh oh...looks like there may be a problem.")
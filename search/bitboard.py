@@ -0,0 +1,71 @@
+# Geometry of the knight's Isolation bitboard used by isolation.Isolation.
+#
+# The board is stored row by row in a single integer where a set bit marks
+# an open cell. Every row has two extra blocked bits at the right, so a row
+# takes 11 + 2 = 13 bits and a knight move can never wrap around into the
+# next row: it lands on one of the blocked padding bits instead.
+
+WIDTH = 11
+HEIGHT = 9
+
+ROW = WIDTH + 2
+SIZE = ROW * HEIGHT - 2
+
+# all cells that are part of the board (the padding bits are not)
+CELLS = tuple(cell for cell in range(SIZE) if cell % ROW < WIDTH)
+ALL_CELLS_MASK = sum(1 << cell for cell in CELLS)
+
+# cell offsets of the knight moves, in the order of isolation.Action
+KNIGHT_OFFSETS = (2 * ROW + 1, ROW + 2, -ROW + 2, -2 * ROW + 1,
+                  -2 * ROW - 1, -ROW - 2, ROW - 2, 2 * ROW - 1)
+
+
+def xy(cell):
+    return cell % ROW, cell // ROW
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def _moves(cell):
+    if cell % ROW >= WIDTH:
+        return ()
+    targets = (cell + offset for offset in KNIGHT_OFFSETS)
+    return tuple(target for target in targets if 0 <= target < SIZE and target % ROW < WIDTH)
+
+
+# destinations of the knight moves from every cell and the same as a bit mask
+MOVES = tuple(_moves(cell) for cell in range(SIZE))
+MOVE_MASKS = tuple(sum(1 << target for target in targets) for targets in MOVES)
+
+
+# the mirror images of the board: identity, flip left-right, flip top-bottom
+# and rotation by 180 degrees, as the image of every cell (padding bits map to
+# themselves); each one is its own inverse and maps knight moves to knight moves
+def _mirror(cell, flip_x, flip_y):
+    x, y = xy(cell)
+    if x >= WIDTH:
+        return cell
+    return (WIDTH - 1 - x if flip_x else x) + (HEIGHT - 1 - y if flip_y else y) * ROW
+
+
+SYMMETRIES = tuple(tuple(_mirror(cell, flip_x, flip_y) for cell in range(SIZE))
+                   for flip_x, flip_y in ((False, False), (True, False), (False, True), (True, True)))
+
+
+def transform_board(board, symmetry):
+    """ Return the bitboard of the mirror image """
+    image = SYMMETRIES[symmetry]
+    return sum(1 << image[cell] for cell in CELLS if board >> cell & 1)
+
+
+def transform_offset(offset, symmetry):
+    """ Return the knight move offset (an isolation.Action) in the mirror image """
+    dy = round(offset / ROW)
+    dx = offset - dy * ROW
+    if symmetry & 1:
+        dx = -dx
+    if symmetry & 2:
+        dy = -dy
+    return dx + dy * ROW
@@ -0,0 +1,62 @@
+import argparse
+import random
+import time
+from collections import Counter
+from functools import partial
+from multiprocessing import cpu_count
+
+from isolation import Isolation
+from mcts import rollout
+from opening_book import (BOOK_DEPTH, BOOK_PATH, OpeningBook, action_code, canonical_action, canonical_key,
+                          parallel_counts, print_progress)
+
+
+def self_play(rounds, depth=BOOK_DEPTH, seed=None):
+    """ Play rounds games with random moves and return the Counters visits
+    and wins keyed by (state key, action code) of the first depth plies;
+    the mirror images of a position share their records
+
+    A move of the book plies counts as a win if the player that made it
+    wins the random rollout from the end of the book plies.
+    """
+    if seed is not None:
+        random.seed(seed)
+    visits = Counter()
+    wins = Counter()
+    for _ in range(rounds):
+        state = Isolation()
+        path = []
+        while len(path) < depth and not state.terminal_test():
+            action = random.choice(state.actions())
+            key, symmetry = canonical_key(state)
+            path.append((key, action_code(canonical_action(state, action, symmetry)), state.player()))
+            state = state.result(action)
+
+        if state.terminal_test():
+            winner = 0 if state.utility(0) > 0 else 1
+        else:
+            # rollout() scores the game for the player that made the last move
+            last_mover = 1 - state.player()
+            winner = last_mover if rollout(state) > 0 else 1 - last_mover
+        for key, code, player in path:
+            visits[key, code] += 1
+            wins[key, code] += player == winner
+    return visits, wins
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add random self-play games to the opening book")
+    parser.add_argument("-n", "--rounds", type=int, default=10000)
+    parser.add_argument("-d", "--depth", type=int, default=BOOK_DEPTH, help="plies recorded per game")
+    parser.add_argument("-o", "--output", default=BOOK_PATH)
+    parser.add_argument("-p", "--processes", type=int, default=cpu_count())
+    parser.add_argument("-s", "--seed", type=int, help="seed of the first shard, random if not given")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    visits, wins = parallel_counts(partial(self_play, depth=args.depth), args.rounds, args.processes, args.seed,
+                                   report=print_progress)
+    with OpeningBook(args.output, writable=True) as book:
+        book.update(visits, wins)
+        print("{} rounds in {:.1f}s, the book has {} records in {} slots".format(
+            args.rounds, time.perf_counter() - start_time, len(book), book.slots))
@@ -1,5 +1,7 @@
 # Please use this implementation for compatability with the test cases
 
+import os
+import sys
 from copy import deepcopy
 
 call_counter = 0
@@ -107,4 +109,22 @@ class GameState:
         """ Return a list of blank spaces on the board."""
         return [(x, y) for y in range(ylim) for x in range(xlim)
                 if self._board[x][y] == 0]
-                
+
+
+# The bitboard version of the game state is shared by the quizzes; this
+# subclass counts its terminal_test() calls in call_counter like GameState.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import queens_bitboard
+
+
+class BitboardGameState(queens_bitboard.BitboardGameState):
+    """ Drop-in replacement for GameState backed by a bitboard, see queens_bitboard """
+    __slots__ = ()
+
+    def terminal_test(self):
+        """ return True if the current state is terminal,
+        and False otherwise (see GameState.terminal_test)
+        """
+        global call_counter
+        call_counter += 1
+        return super().terminal_test()
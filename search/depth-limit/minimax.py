@@ -2,6 +2,13 @@
 # TODO: Change the value returned when the depth cutoff is
 #       reached to call and return the score from my_moves()
 
+import os
+import sys
+
+# the search engine is shared with the other search exercises
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from adversarial import AlphaBetaSearch, state_key
+
 # Use the player_id when you call "my_moves()"
 # DO NOT MODIFY THE PLAYER ID
 player_id = 0
@@ -14,7 +21,16 @@ def my_moves(gameState):
     return len(gameState.liberties(gameState._player_locations[player_id]))
 
 
-def minimax_decision(gameState, depth):
+def minimax_engine(table=None, deadline=None):
+    """ Return the search engine of the depth limited minimax:
+    no pruning, my_moves() at the depth limit, values for player_id; the
+    quiz trees are tiny, so the deadline is checked at every node
+    """
+    return AlphaBetaSearch(player_id, my_moves, table, key=state_key, pruning=False, deadline=deadline,
+                           time_check_interval=1)
+
+
+def minimax_decision(gameState, depth, solution=None):
     """ Return the move along a branch of the game tree that
     has the best possible value.  A move is a pair of coordinates
     in (column, row) order corresponding to a legal move for
@@ -22,51 +38,20 @@ def minimax_decision(gameState, depth):
 
     You can ignore the special case of calling this function
     from a terminal state.
+
+    With a SolvedGame as solution the exact values of a solved board
+    are used instead of searching, which plays perfectly whatever the
+    depth limit.
     """
+    if solution is not None:
+        return solution.best_action(gameState)
+    engine = minimax_engine()
     best_score = float("-inf")
     best_move = None
     for a in gameState.actions():
         # call has been updated with a depth limit
-        v = min_value(gameState.result(a), depth - 1)
+        v = engine.value(gameState.result(a), depth - 1)
         if v > best_score:
             best_score = v
             best_move = a
     return best_move
-
-
-def min_value(gameState, depth):
-    """ Return the value for a win (+1) if the game is over,
-    otherwise return the minimum value over all legal child
-    nodes.
-    """
-    if gameState.terminal_test():
-        return gameState.utility(0)
-
-    # New conditional depth limit cutoff
-    if depth <= 0:  # "==" could be used, but "<=" is safer
-        return my_moves(gameState)
-
-    v = float("inf")
-    for a in gameState.actions():
-        # the depth should be decremented by 1 on each call
-        v = min(v, max_value(gameState.result(a), depth - 1))
-    return v
-
-
-def max_value(gameState, depth):
-    """ Return the value for a loss (-1) if the game is over,
-    otherwise return the maximum value over all legal child
-    nodes.
-    """
-    if gameState.terminal_test():
-        return gameState.utility(0)
-
-    # New conditional depth limit cutoff
-    if depth <= 0:  # "==" could be used, but "<=" is safer
-        return my_moves(gameState)
-
-    v = float("-inf")
-    for a in gameState.actions():
-        # the depth should be decremented by 1 on each call
-        v = max(v, min_value(gameState.result(a), depth - 1))
-    return v
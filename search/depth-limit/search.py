@@ -1,10 +1,94 @@
 
-from minimax import minimax_decision
+import time
 
-def get_action(gameState, depth_limit):
-    # TODO: Implement a function that calls minimax_decision
-    # for each depth from 1...depth_limit (inclusive of both endpoints)
-    best_move = None
+from minimax import minimax_engine, my_moves, player_id
+# importing minimax has put the shared search modules on the path
+from adversarial import SearchTimeout
+from solver import exact_state_key
+
+def get_action(gameState, depth_limit, time_limit=None, reuse=False):
+    # Calls the depth limited minimax search for each depth
+    # from 1...depth_limit (inclusive of both endpoints) and
+    # returns the best move of the deepest search.
+    #
+    # Without a time limit the result is the same as
+    # minimax_decision(gameState, depth_limit), except that
+    # a lost position still gets a legal move (instead of
+    # None).
+    #
+    # With a time_limit in ms the search stops at the
+    # deadline. The root moves are searched in the order of
+    # their values at the previous depth, ties in their
+    # original order, and the move of the last completed
+    # depth is returned, unless a move of the interrupted
+    # depth was already searched and scored higher than the
+    # previous best move, which that depth searched first.
+    #
+    # With reuse=True the positions are kept in a GameTree
+    # from one depth to the next, so each depth only extends
+    # the leaves of the previous one: terminal_test() runs
+    # once per position instead of once per position and
+    # depth. The values, and so the move, stay the same.
+    deadline = None if time_limit is None else time.perf_counter() + time_limit / 1000
+    if reuse:
+        value = GameTree(deadline).value
+    else:
+        value = minimax_engine(deadline=deadline).value
+    actions = gameState.actions()
+    index = {a: i for i, a in enumerate(actions)}
+    best_move = actions[0] if actions else None
     for depth in range(1, depth_limit+1):
-        best_move = minimax_decision(gameState, depth)
-    return best_move
\ No newline at end of file
+        scores = {}
+        try:
+            for a in actions:
+                scores[a] = value(gameState.result(a), depth - 1)
+        except SearchTimeout:
+            if scores and max(scores.values()) > scores[actions[0]]:
+                best_move = max(scores, key=lambda a: (scores[a], -index[a]))
+            break
+        actions.sort(key=lambda a: (-scores[a], index[a]))
+        best_move = actions[0]
+    return best_move
+
+
+class GameTree:
+    """ Positions searched by the depth limited minimax, kept between
+    the depths of get_action(gameState, depth_limit, reuse=True)
+
+    Every position is tested once: a terminal one keeps its utility, the
+    others keep their child states once they have been expanded. Positions
+    reached by different move orders share one entry. Values are cached
+    per (position, depth).
+    """
+
+    def __init__(self, deadline=None):
+        self.deadline = deadline
+        # exact_state_key -> [utility or None if not terminal, child states or None]
+        self.positions = {}
+        self.values = {}
+
+    def value(self, gameState, depth):
+        """ Return the minimax value of the state for player_id, with
+        my_moves() at the depth limit
+        """
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        key = exact_state_key(gameState)
+        position = self.positions.get(key)
+        if position is None:
+            utility = gameState.utility(player_id) if gameState.terminal_test() else None
+            position = self.positions[key] = [utility, None]
+        utility, children = position
+        if utility is not None:
+            return utility
+        if depth <= 0:
+            return my_moves(gameState)
+
+        v = self.values.get((key, depth))
+        if v is None:
+            if children is None:
+                children = position[1] = [gameState.result(a) for a in gameState.actions()]
+            values = [self.value(child, depth - 1) for child in children]
+            v = max(values) if gameState.player() == player_id else min(values)
+            self.values[key, depth] = v
+        return v
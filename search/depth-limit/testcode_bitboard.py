@@ -0,0 +1,24 @@
+
+import minimax
+import search
+import gamestate as game
+
+
+# The bitboard game state is a drop-in replacement for GameState: the
+# searches have to visit the same number of nodes and return the same
+# moves on both of them
+tests = [("minimax_decision", minimax.minimax_decision, 1, 5),
+         ("get_action", search.get_action, 2, 30)]
+for name, function, depth_limit, expected_node_count in tests:
+    game.call_counter = 0
+    move = function(game.GameState(), depth_limit)
+    game.call_counter = 0
+    bitboard_move = function(game.BitboardGameState(), depth_limit)
+
+    print("{}: expected node count: {}".format(name, expected_node_count))
+    print("{}: your bitboard node count: {}".format(name, game.call_counter))
+
+    if game.call_counter == expected_node_count and bitboard_move == move:
+        print("That's right! The bitboard state works with {}!".format(name))
+    else:
+        print("Uh oh...looks like there may be a problem.")
@@ -0,0 +1,26 @@
+import time
+
+import search
+import gamestate as game
+
+
+# Test that get_action() returns soon after its time limit --
+# the depth limit is far deeper than the game, so every search
+# runs until the deadline interrupts it, and the search has to
+# notice the deadline within a node instead of finishing the
+# depth first
+time_limit = 5
+tolerance = 1
+depth_limit = 1000
+for reuse in (False, True):
+    start = time.perf_counter()
+    move = search.get_action(game.GameState(), depth_limit, time_limit, reuse=reuse)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print("Reuse {}: time limit: {} ms".format(reuse, time_limit))
+    print("Reuse {}: your search time: {:.2f} ms".format(reuse, elapsed))
+
+    if move is not None and elapsed <= time_limit + tolerance:
+        print("That's right! Looks like your search stops at the deadline!")
+    else:
+        print("Uh oh...looks like there may be a problem.")
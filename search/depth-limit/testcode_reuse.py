@@ -0,0 +1,26 @@
+
+import search
+import gamestate as game
+
+
+# Test that iterative deepening with reuse=True extends the
+# positions of the previous depth instead of searching them
+# again -- the depth two search only tests the five children
+# of the root once, and by depth five the tree holds every
+# position of the game, so deeper searches test nothing new
+tests = [(2, 25), (8, 188)]
+for depth_limit, expected_node_count in tests:
+    game.call_counter = 0
+    move = search.get_action(game.GameState(), depth_limit)
+    node_count = game.call_counter
+    game.call_counter = 0
+    reused_move = search.get_action(game.GameState(), depth_limit, reuse=True)
+
+    print("Depth {}: node count without reuse: {}".format(depth_limit, node_count))
+    print("Depth {}: expected node count with reuse: {}".format(depth_limit, expected_node_count))
+    print("Depth {}: your node count with reuse: {}".format(depth_limit, game.call_counter))
+
+    if game.call_counter == expected_node_count and reused_move == move:
+        print("That's right! Looks like your search reuses the previous depths!")
+    else:
+        print("Uh oh...looks like there may be a problem.")
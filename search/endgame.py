@@ -0,0 +1,163 @@
+# Exact solver for knight's Isolation positions in which the players are
+# separated.
+#
+# Once no open cell can be reached by both players they can't influence each
+# other anymore: each one just follows its longest path through its own
+# region, and the player to move loses if its path is not longer than the
+# opponent's. The regions are found by a flood fill on the bitboard (the
+# padding bits of bitboard.py stop the shifted knight moves at the edges),
+# the longest paths by a depth-first search memoized on (region, cell).
+#
+# Isolation._has_liberties() tests any(liberties), and a liberty at cell 0 is
+# falsy: a knight whose only open move leads to cell 0 counts as stuck and
+# the game ends there. The longest paths follow that rule.
+
+from bitboard import MOVE_MASKS, popcount
+
+# the flood fill is only tried on boards with at most this many open cells,
+# players are hardly ever separated before
+ENDGAME_OPEN_CELLS = 60
+# search budget of solving a position, beyond it the position is left to the heuristic
+_MAX_NODES = 64
+# the memo of the longest path search is cleared beyond this many entries
+_CACHE_SIZE = 2 ** 18
+
+
+class BudgetExceeded(Exception):
+    """ Raised when a longest path search visits more nodes than allowed """
+
+
+def knight_moves(mask, board):
+    """ Return the open cells a knight can move to from any cell of the mask """
+    # the shifts are the offsets of bitboard.KNIGHT_OFFSETS
+    return ((mask << 27 | mask << 15 | mask << 11 | mask << 25 |
+             mask >> 11 | mask >> 25 | mask >> 27 | mask >> 15) & board)
+
+
+def reachable(board, loc):
+    """ Return the mask of all open cells a knight on loc can eventually reach """
+    region = 0
+    frontier = board & MOVE_MASKS[loc]
+    while frontier:
+        region |= frontier
+        frontier = knight_moves(frontier, board) & ~region
+    return region
+
+
+def separated(board, locs):
+    """ Return the regions of both players if no cell is reachable by both, else None """
+    own_region = reachable(board, locs[0])
+    opp_region = reachable(board, locs[1])
+    if own_region & opp_region:
+        return None
+    return own_region, opp_region
+
+
+class EndgameSolver:
+    """ Decide separated positions exactly
+
+    solve() and value() return None whenever the players are not separated
+    or the longest path searches need more than max_nodes nodes, so the
+    caller can fall back to its usual search. The memo of longest paths is
+    kept between calls, so a solver should live as long as its player.
+    """
+
+    def __init__(self, max_nodes=_MAX_NODES, open_cells=ENDGAME_OPEN_CELLS):
+        self.max_nodes = max_nodes
+        self.open_cells = open_cells
+        self._cache = {}
+        self._budget = 0
+        self.nodes = 0
+        self.checks = 0
+        self.solved = 0
+
+    def longest_path(self, board, loc, max_nodes=None):
+        """ Return the maximum number of moves a knight on loc can make
+
+        Raise BudgetExceeded if the search needs more than max_nodes nodes.
+        """
+        self._budget = self.max_nodes if max_nodes is None else max_nodes
+        return self._longest_path(reachable(board, loc), loc)
+
+    def _longest_path(self, board, loc):
+        key = (board, loc)
+        length = self._cache.get(key)
+        if length is not None:
+            return length
+
+        self.nodes += 1
+        self._budget -= 1
+        if self._budget < 0:
+            raise BudgetExceeded()
+
+        # a path can't be longer than the number of open cells left
+        bound = popcount(board)
+        length = 0
+        moves = board & MOVE_MASKS[loc]
+        if moves == 1:  # only cell 0 is open, the game treats the knight as stuck
+            moves = 0
+        while moves and length < bound:
+            bit = moves & -moves
+            moves ^= bit
+            length = max(length, 1 + self._longest_path(board ^ bit, bit.bit_length() - 1))
+
+        self._cache[key] = length
+        return length
+
+    def solve(self, game_state, max_nodes=None):
+        """ Return (value, action) for the player to move if the position
+        is separated and solved in time, else None
+
+        value is +inf if the player to move wins, -inf if it loses (as
+        returned by Isolation.utility); action starts its longest path.
+        """
+        locs = game_state.locs
+        if None in locs:
+            return None
+        self.checks += 1
+        player = game_state.player()
+        board = game_state.board
+        if not separated(board, (locs[player], locs[1 - player])):
+            return None
+
+        if len(self._cache) > _CACHE_SIZE:
+            self._cache = {}
+        # the budget is shared by the longest paths of both players
+        self._budget = self.max_nodes if max_nodes is None else max_nodes
+        try:
+            opp_length = self._longest_path(reachable(board, locs[1 - player]), locs[1 - player])
+            best_action = None
+            own_length = -1
+            for action in game_state.actions():
+                cell = locs[player] + action
+                board_after_move = board ^ (1 << cell)
+                length = 1 + self._longest_path(reachable(board_after_move, cell), cell)
+                if length > own_length:
+                    own_length, best_action = length, action
+        except BudgetExceeded:
+            return None
+
+        self.solved += 1
+        # the players alternate, so the one whose path runs out first loses
+        value = float("inf") if own_length > opp_length else float("-inf")
+        return value, best_action
+
+    def value(self, game_state, player_id, max_nodes=None):
+        """ Return the exact value of the state for player_id (+inf or -inf)
+        or None if it isn't a separated endgame that can be solved in time
+        """
+        if popcount(game_state.board) > self.open_cells:
+            return None
+        solution = self.solve(game_state, max_nodes)
+        if solution is None:
+            return None
+        value, _ = solution
+        return value if game_state.player() == player_id else -value
+
+    def stats(self):
+        return {
+            "endgame_checks": self.checks,
+            "endgame_solved": self.solved,
+            "endgame_nodes": self.nodes,
+            "endgame_cache_entries": len(self._cache),
+        }
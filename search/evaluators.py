@@ -0,0 +1,162 @@
+import os
+import time
+
+import heuristics
+
+# evaluator of CustomPlayer unless another one is given to the constructor
+DEFAULT_EVALUATOR = os.environ.get("ISOLATION_EVALUATOR", "diff_liberties")
+
+# every n-th call of an evaluator is timed, timing every call would double its cost
+_CALLS_BETWEEN_TIMINGS = 64
+
+
+def _timer_overhead(samples=1000):
+    start = time.perf_counter()
+    for _ in range(samples):
+        time.perf_counter()
+    return (time.perf_counter() - start) / samples
+
+
+# seconds a perf_counter() call adds to a timed call, subtracted from the measured cost
+_TIMER_OVERHEAD = _timer_overhead()
+
+# the terms of heuristics.py by name, usable in an evaluator spec
+TERMS = {
+    "diff_liberties": heuristics.diff_liberties,
+    "own_center": heuristics.own_center,
+    "opp_border": heuristics.opp_border,
+    "own_surrounding": heuristics.own_surrounding,
+    "diff_surrounding": heuristics.diff_surrounding,
+    "own_quadrant": heuristics.own_quadrant,
+    "diff_quadrant": heuristics.diff_quadrant,
+    "approach_opponent": heuristics.approach_opponent,
+    "avoid_opponent": heuristics.avoid_opponent,
+}
+
+# named weighted combinations of the terms, the alternatives tried for CustomPlayer.score
+_REGISTRY = {
+    "diff_liberties": {"diff_liberties": 1},
+    "own_center": {"own_center": 1},
+    "opp_border": {"opp_border": 1},
+    "own_center_2_diff_liberties": {"own_center": 1, "diff_liberties": 2},
+    "own_center_diff_liberties": {"own_center": 1, "diff_liberties": 1},
+    "opp_border_own_center": {"opp_border": 1, "own_center": 1},
+    "opp_border_own_center_diff_liberties": {"opp_border": 1, "own_center": 1, "diff_liberties": 1},
+    "own_surrounding": {"own_surrounding": 1},
+    "diff_surrounding": {"diff_surrounding": 1},
+    "own_surrounding_own_center": {"own_surrounding": 1, "own_center": 1},
+    "approach_opponent": {"approach_opponent": 1},
+    "avoid_opponent": {"avoid_opponent": 1},
+    "own_quadrant": {"own_quadrant": 1},
+    "diff_quadrant": {"diff_quadrant": 1},
+}
+
+
+class Evaluator:
+    """ A named weighted sum of heuristic terms that measures its own cost
+
+    Call it with (board, own_loc, opp_loc) like a term. Every
+    _CALLS_BETWEEN_TIMINGS-th call is timed, so cost() is the mean time per
+    call observed during real searches; benchmark() measures it on a given
+    list of states instead.
+    """
+
+    def __init__(self, name, weights):
+        self.name = name
+        self.weights = dict(weights)
+        self.weighted_terms = tuple((TERMS[term], weight) for term, weight in self.weights.items())
+        self.calls = 0
+        self.timed_calls = 0
+        self.timed_seconds = 0.
+        self._evaluate = self._compile(self.weighted_terms)
+
+    @staticmethod
+    def _compile(weighted_terms):
+        # skip the weighted sum for the common case of a single term with weight 1
+        if len(weighted_terms) == 1 and weighted_terms[0][1] == 1:
+            return weighted_terms[0][0]
+        return lambda board, own_loc, opp_loc: heuristics.evaluate(board, own_loc, opp_loc, weighted_terms)
+
+    def __call__(self, board, own_loc, opp_loc):
+        self.calls += 1
+        if self.calls % _CALLS_BETWEEN_TIMINGS:
+            return self._evaluate(board, own_loc, opp_loc)
+
+        start = time.perf_counter()
+        value = self._evaluate(board, own_loc, opp_loc)
+        self.timed_seconds += time.perf_counter() - start
+        self.timed_calls += 1
+        return value
+
+    def __repr__(self):
+        return "Evaluator({!r}, {!r})".format(self.name, self.weights)
+
+    def cost(self):
+        """ Return the mean seconds per call of the timed calls """
+        if not self.timed_calls:
+            return 0.
+        return max(0., self.timed_seconds / self.timed_calls - _TIMER_OVERHEAD)
+
+    def benchmark(self, states, player_id, repeat=3):
+        """ Return the best mean seconds per state of evaluating the states repeat times """
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            heuristics.evaluate_batch(states, player_id, self.weighted_terms)
+            best = min(best, (time.perf_counter() - start) / max(1, len(states)))
+        return best
+
+    def stats(self):
+        return {
+            "evaluator": self.name,
+            "evaluator_calls": self.calls,
+            "evaluator_cost_us": 1e6 * self.cost(),
+        }
+
+
+def _check_terms(weights):
+    unknown = set(weights) - set(TERMS)
+    if unknown:
+        raise ValueError("unknown heuristic terms: {}".format(", ".join(sorted(unknown))))
+
+
+def register(name, weights):
+    """ Add a named combination of terms, given as {term name: weight} """
+    _check_terms(weights)
+    _REGISTRY[name] = dict(weights)
+
+
+def names():
+    return sorted(_REGISTRY)
+
+
+def get(spec=None):
+    """ Return a new Evaluator for a spec
+
+    The spec is the name of a registered combination, a {term name: weight}
+    dict, or a string of comma separated "term:weight" pairs like
+    "own_center:1,diff_liberties:2". None selects DEFAULT_EVALUATOR, which
+    can be set with the ISOLATION_EVALUATOR environment variable.
+    """
+    if spec is None:
+        spec = DEFAULT_EVALUATOR
+    if isinstance(spec, Evaluator):
+        return Evaluator(spec.name, spec.weights)
+    if isinstance(spec, dict):
+        weights = spec
+        name = ",".join("{}:{}".format(term, weight) for term, weight in spec.items())
+    elif spec in _REGISTRY:
+        weights = _REGISTRY[spec]
+        name = spec
+    else:
+        weights = {}
+        for pair in spec.split(","):
+            term, _, weight = pair.strip().partition(":")
+            if term not in TERMS:
+                raise ValueError("unknown evaluator or heuristic term: {!r}".format(term))
+            number = float(weight) if weight else 1.
+            weights[term] = int(number) if number.is_integer() else number
+        name = spec
+
+    _check_terms(weights)
+    return Evaluator(name, weights)
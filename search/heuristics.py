@@ -0,0 +1,121 @@
+# Evaluation terms of knight's Isolation computed on the bitboard.
+#
+# Every term is a few bit operations on isolation.Isolation.board: the
+# cells a term looks at are precomputed as one bit mask per cell, so a term
+# is board & mask followed by a popcount instead of a loop over the cells.
+# All terms take (board, own_loc, opp_loc), so they can be combined freely
+# with weights (see evaluate() and evaluate_batch()).
+
+from bitboard import CELLS, HEIGHT, MOVE_MASKS, ROW, SIZE, WIDTH, popcount, xy
+
+_CENTER = (5, 4)
+# the surrounding fields are a square of (2 * radius + 1) ** 2 cells
+_SURROUNDING_RADIUS = 2
+
+_X = tuple(xy(cell)[0] for cell in range(SIZE))
+_Y = tuple(xy(cell)[1] for cell in range(SIZE))
+
+
+def _mask(x_range, y_range):
+    return sum(1 << (x + y * ROW) for x in x_range if 0 <= x < WIDTH for y in y_range if 0 <= y < HEIGHT)
+
+
+def _surrounding_mask(cell):
+    x, y = xy(cell)
+    return _mask(range(x - _SURROUNDING_RADIUS, x + _SURROUNDING_RADIUS + 1),
+                 range(y - _SURROUNDING_RADIUS, y + _SURROUNDING_RADIUS + 1))
+
+
+def _quadrant_masks(cell):
+    # the four rectangles from the cell to the corners of the board, each including the cell's row and column
+    x, y = xy(cell)
+    return (_mask(range(x, WIDTH), range(y, HEIGHT)),
+            _mask(range(0, x + 1), range(y, HEIGHT)),
+            _mask(range(0, x + 1), range(0, y + 1)),
+            _mask(range(x, WIDTH), range(0, y + 1)))
+
+
+# manhattan distance of every cell to the center of the board
+CENTER_DISTANCE = tuple(abs(_X[cell] - _CENTER[0]) + abs(_Y[cell] - _CENTER[1]) for cell in range(SIZE))
+SURROUNDING_MASKS = tuple(_surrounding_mask(cell) if cell in CELLS else 0 for cell in range(SIZE))
+QUADRANT_MASKS = tuple(_quadrant_masks(cell) if cell in CELLS else (0, 0, 0, 0) for cell in range(SIZE))
+
+
+def liberties(board, loc):
+    """ Return the number of open cells a knight on loc can move to """
+    return popcount(board & MOVE_MASKS[loc])
+
+
+def surrounding_fields(board, loc):
+    """ Return the number of open cells in the 5x5 square around loc """
+    return popcount(board & SURROUNDING_MASKS[loc])
+
+
+def biggest_quadrant(board, loc):
+    """ Return the number of open cells in the emptiest quadrant seen from loc """
+    return max(popcount(board & mask) for mask in QUADRANT_MASKS[loc])
+
+
+def distance(loc_1, loc_2):
+    """ Return the manhattan distance of two cells """
+    return abs(_X[loc_1] - _X[loc_2]) + abs(_Y[loc_1] - _Y[loc_2])
+
+
+def diff_liberties(board, own_loc, opp_loc):
+    return popcount(board & MOVE_MASKS[own_loc]) - popcount(board & MOVE_MASKS[opp_loc])
+
+
+def own_center(board, own_loc, opp_loc):
+    return 5 - CENTER_DISTANCE[own_loc]
+
+
+def opp_border(board, own_loc, opp_loc):
+    return CENTER_DISTANCE[opp_loc] - 5
+
+
+def own_surrounding(board, own_loc, opp_loc):
+    return popcount(board & SURROUNDING_MASKS[own_loc])
+
+
+def diff_surrounding(board, own_loc, opp_loc):
+    return popcount(board & SURROUNDING_MASKS[own_loc]) - popcount(board & SURROUNDING_MASKS[opp_loc])
+
+
+def own_quadrant(board, own_loc, opp_loc):
+    # max empty fields is nearly 100, so calculate a score which is positive for bigger quadrants
+    return biggest_quadrant(board, own_loc) - 40
+
+
+def diff_quadrant(board, own_loc, opp_loc):
+    return biggest_quadrant(board, own_loc) - biggest_quadrant(board, opp_loc)
+
+
+def approach_opponent(board, own_loc, opp_loc):
+    # max distance is 18, so the score is positive for lower distances and negative for bigger ones
+    return 9 - distance(own_loc, opp_loc)
+
+
+def avoid_opponent(board, own_loc, opp_loc):
+    return distance(own_loc, opp_loc) - 9
+
+
+def evaluate(board, own_loc, opp_loc, weighted_terms):
+    """ Return the weighted sum of the terms, given as (term, weight) pairs """
+    return sum(weight * term(board, own_loc, opp_loc) for term, weight in weighted_terms)
+
+
+def evaluate_batch(states, player_id, weighted_terms):
+    """ Return the weighted sum of the terms for each of the states
+
+    The loop is over the terms first: each term is mapped over the columns
+    of boards and locations of the whole batch, so the per-state overhead
+    of unpacking the terms and weights is paid once per term instead.
+    """
+    boards = [state.board for state in states]
+    own_locs = [state.locs[player_id] for state in states]
+    opp_locs = [state.locs[1 - player_id] for state in states]
+    scores = [0] * len(boards)
+    for term, weight in weighted_terms:
+        values = map(term, boards, own_locs, opp_locs)
+        scores = [score + weight * value for score, value in zip(scores, values)]
+    return scores
@@ -0,0 +1,401 @@
+import math, os, random, time
+from array import array
+from collections import defaultdict
+
+from bitboard import MOVE_MASKS, popcount
+from playout import playout
+
+_EXPLORATION_WEIGHT = 1.7
+# number of visits after which the own statistics of a node weigh as much
+# as its all-moves-as-first statistics
+_RAVE_EQUIVALENCE = 300
+# progressive widening: a node with n visits may use the first
+# _WIDENING_COEFFICIENT * n ** _WIDENING_EXPONENT children (best prior first)
+_WIDENING_COEFFICIENT = 2
+_WIDENING_EXPONENT = 0.5
+_PLAYOUTS_BETWEEN_STOP_CHECKS = 32
+# leaves that leaf_parallel_search hands to each process in one round trip
+_LEAVES_PER_TASK = 8
+
+# first_child markers of nodes without children
+_NOT_EXPANDED = -1
+_TERMINAL = -2
+
+
+class SearchTree:
+    """ Monte carlo search tree stored as a structure of arrays
+
+    Node i of the tree is described by the i-th entry of the parallel arrays
+    visits, q_value, parent, first_child, child_count, action, cell (the
+    destination of the action) and the RAVE statistics. When a node
+    is expanded all its children are allocated at once and stored next to
+    each other, so the children of node i are
+    range(first_child[i], first_child[i] + child_count[i]). A child that has
+    no visits yet has not been tried.
+
+    Game states are not stored in the tree (except for the root); the state
+    of a node is materialised by applying the actions on the path from the
+    root while the tree is descended. A node costs about 35 bytes instead of
+    a Python object with its own state and action lists.
+
+    q_value[i] is the sum of the playout results from the point of view of
+    the player that made the move leading to node i.
+
+    With rave=True the tree also collects all-moves-as-first statistics:
+    amaf_visits[i] and amaf_value[i] count every simulation through the
+    parent of node i in which the player to move there occupied cell[i] at
+    any later point, as if it had been the first move. Selection blends
+    them with the node's own value; the AMAF part fades out with growing
+    visits, see _RAVE_EQUIVALENCE.
+
+    With widening=True the children are stored in the order of a cheap
+    prior (the number of onward moves from the destination cell) and only
+    the first few of them are considered until the node has enough visits,
+    see _WIDENING_COEFFICIENT.
+    """
+
+    def __init__(self, root_state, rave=True, widening=True):
+        self.root_state = root_state
+        self.rave = rave
+        self.widening = widening
+        self.stopped_early = False
+        self.visits = array("i", [0])
+        self.q_value = array("d", [0.])
+        self.parent = array("i", [-1])
+        self.first_child = array("i", [_NOT_EXPANDED])
+        self.child_count = array("B", [0])
+        self.action = array("i", [0])
+        self.cell = array("h", [-1])
+        self.amaf_visits = array("i", [0])
+        self.amaf_value = array("d", [0.])
+
+    def __len__(self):
+        return len(self.visits)
+
+    @property
+    def nbytes(self):
+        return sum(len(values) * values.itemsize for values in
+                   (self.visits, self.q_value, self.parent, self.first_child, self.child_count, self.action,
+                    self.cell, self.amaf_visits, self.amaf_value))
+
+    def children(self, node):
+        first = self.first_child[node]
+        return range(first, first + self.child_count[node]) if first >= 0 else range(0)
+
+    def _add_node(self, parent, action, cell):
+        self.visits.append(0)
+        self.q_value.append(0.)
+        self.parent.append(parent)
+        self.first_child.append(_NOT_EXPANDED)
+        self.child_count.append(0)
+        self.action.append(action)
+        self.cell.append(cell)
+        self.amaf_visits.append(0)
+        self.amaf_value.append(0.)
+
+    def expand(self, node, game_state):
+        """ Allocate the children of the node, or mark it as terminal """
+        if game_state.terminal_test():
+            self.first_child[node] = _TERMINAL
+            return
+        actions = game_state.actions()
+        loc = game_state.locs[game_state.player()]
+        cells = [action if loc is None else loc + action for action in actions]
+        children = list(zip(actions, cells))
+        if self.widening and loc is not None:
+            board = game_state.board
+            children.sort(key=lambda child: -popcount(board & MOVE_MASKS[child[1]]))
+
+        self.first_child[node] = len(self.visits)
+        self.child_count[node] = len(children)
+        for action, cell in children:
+            self._add_node(node, action, cell)
+
+    def widened_children(self, node):
+        """ Return the children of the node that may be selected """
+        children = self.children(node)
+        if not self.widening:
+            return children
+        width = max(1, int(_WIDENING_COEFFICIENT * self.visits[node] ** _WIDENING_EXPONENT))
+        return children[:width]
+
+    def select(self):
+        """ Descend from the root with the tree policy and return the selected
+        node together with its materialised game state: either an untried
+        child of the first node that is not fully expanded, or a terminal node
+        """
+        node = 0
+        game_state = self.root_state
+
+        while True:
+            if self.first_child[node] == _NOT_EXPANDED:
+                self.expand(node, game_state)
+            if self.first_child[node] == _TERMINAL:
+                return node, game_state
+
+            untried = [child for child in self.widened_children(node) if self.visits[child] == 0]
+            if untried and self.rave:
+                # try the move with the best all-moves-as-first value first
+                node = max(untried, key=lambda child: (self.amaf_value[child] / self.amaf_visits[child]
+                                                       if self.amaf_visits[child] else 0.) + random.random() * 1e-3)
+            else:
+                node = random.choice(untried) if untried else self.best_child(node)
+            game_state = game_state.result(self.action[node])
+            if untried:
+                return node, game_state
+
+    def best_child(self, node, exploration_weight=_EXPLORATION_WEIGHT):
+        """ Return the child with the highest upper confidence bound """
+        max_uct = float("-inf")
+        best_child = None
+        # the log term only depends on the parent, so it is computed once
+        exploration = exploration_weight * math.sqrt(2 * math.log(self.visits[node]))
+        visits = self.visits
+        q_value = self.q_value
+        amaf_visits = self.amaf_visits
+
+        for child in self.children(node):
+            if not visits[child]:
+                continue
+            value = q_value[child] / visits[child]
+            if self.rave and amaf_visits[child]:
+                beta = math.sqrt(_RAVE_EQUIVALENCE / (3 * visits[child] + _RAVE_EQUIVALENCE))
+                value = (1 - beta) * value + beta * self.amaf_value[child] / amaf_visits[child]
+            uct = value + exploration / math.sqrt(visits[child])
+            if uct > max_uct:
+                max_uct = uct
+                best_child = child
+
+        return best_child
+
+    def backpropagate(self, node, result, playouts=1, played=()):
+        """ Add the playout result (the sum of the results if there were
+        several playouts) to the node and all its ancestors, with the sign
+        flipped on every level
+
+        played are the cells moved to in the playout, starting with the
+        player to move at the node; they update the RAVE statistics.
+        """
+        # cells occupied from here on by the player that made the move into
+        # the current node (index 1) and by the other player (index 0)
+        occupied = (set(played[0::2]), set(played[1::2])) if self.rave else None
+        mover = 1
+
+        while node >= 0:
+            self.visits[node] += playouts
+            self.q_value[node] += result
+            parent = self.parent[node]
+            if occupied is not None and parent >= 0:
+                cells = occupied[mover]
+                cells.add(self.cell[node])
+                for sibling in self.children(parent):
+                    if self.cell[sibling] in cells:
+                        self.amaf_visits[sibling] += playouts
+                        self.amaf_value[sibling] += result
+            result = -result
+            mover = 1 - mover
+            node = parent
+
+    def search(self, deadline, early_stop=True):
+        """ Run playouts until time.perf_counter() passes the deadline and
+        return the number of playouts
+
+        With early_stop=True the search also ends as soon as the most visited
+        root child is ahead of every other one by more visits than the
+        playouts that fit into the remaining time at the current rate.
+        """
+        start_time = time.perf_counter()
+        playouts = 0
+        self.stopped_early = False
+
+        while time.perf_counter() < deadline:
+            node, game_state = self.select()
+            played = [] if self.rave else None
+            result = rollout(game_state, played=played)
+            self.backpropagate(node, result, 1, played or ())
+            playouts += 1
+
+            if early_stop and playouts % _PLAYOUTS_BETWEEN_STOP_CHECKS == 0:
+                now = time.perf_counter()
+                remaining_playouts = playouts / (now - start_time) * (deadline - now)
+                if self.visit_lead() > remaining_playouts:
+                    self.stopped_early = True
+                    break
+        return playouts
+
+    def most_visited_child(self, node):
+        return max(self.children(node), key=self.visits.__getitem__)
+
+    def visit_lead(self):
+        """ Return how many visits the most visited root child is ahead of
+        the second one (infinite if there is only one root child)
+        """
+        visits = sorted((self.visits[child] for child in self.children(0)), reverse=True)
+        return visits[0] - visits[1] if len(visits) > 1 else float("inf")
+
+    def best_action(self):
+        """ Return the root action (as returned by root_state.actions()) of
+        the most visited child; before any playout that is the child with the
+        best prior
+        """
+        if self.first_child[0] == _NOT_EXPANDED:
+            self.expand(0, self.root_state)
+        action = self.action[self.most_visited_child(0)]
+        return next(a for a in self.root_state.actions() if a == action)
+
+    def principal_variation(self):
+        """ Return the actions along the most visited children from the root """
+        actions = []
+        node = 0
+        while self.children(node):
+            node = self.most_visited_child(node)
+            if not self.visits[node]:
+                break
+            actions.append(self.action[node])
+        return actions
+
+    def child_with_state(self, node, node_state, game_state):
+        """ Return the child of the node (whose state is node_state) that
+        leads to game_state, or None
+        """
+        for child in self.children(node):
+            if node_state.result(self.action[child]) == game_state:
+                return child
+        return None
+
+    def subtree(self, node, game_state, max_nodes, min_visits):
+        """ Return a new tree with the node as root, game_state being the
+        state of the node. Nodes are copied breadth first until max_nodes
+        are reached; children with less than min_visits are copied as
+        untried children and their subtrees are dropped.
+        """
+        tree = SearchTree(game_state, self.rave, self.widening)
+        tree.visits[0] = self.visits[node]
+        tree.q_value[0] = self.q_value[node]
+        tree.first_child[0] = _TERMINAL if self.first_child[node] == _TERMINAL else _NOT_EXPANDED
+        nodes_to_copy = [(node, 0)]
+
+        for old_node, new_node in nodes_to_copy:
+            children = self.children(old_node)
+            if not children or len(tree) + len(children) > max_nodes:
+                continue
+            tree.first_child[new_node] = len(tree)
+            tree.child_count[new_node] = len(children)
+            for old_child in children:
+                tree._add_node(new_node, self.action[old_child], self.cell[old_child])
+                tree.amaf_visits[-1] = self.amaf_visits[old_child]
+                tree.amaf_value[-1] = self.amaf_value[old_child]
+                if self.visits[old_child] >= min_visits:
+                    new_child = len(tree) - 1
+                    tree.visits[new_child] = self.visits[old_child]
+                    tree.q_value[new_child] = self.q_value[old_child]
+                    tree.first_child[new_child] = self.first_child[old_child] if \
+                        self.first_child[old_child] == _TERMINAL else _NOT_EXPANDED
+                    nodes_to_copy.append((old_child, new_child))
+
+        return tree
+
+
+def rollout(game_state, biased=False, played=None):
+    """ Play random moves until the game ends and return +1 if the player
+    that made the last move into game_state wins, otherwise -1
+    (see playout.playout for the biased move choice and played)
+    """
+    player_id = 1 - game_state.player()
+    if None not in game_state.locs:
+        winner = playout(game_state.board, game_state.locs, game_state.player(), biased, played)
+        return 1. if winner == player_id else -1.
+
+    # before both players have placed their token any open cell is a legal move
+    while not game_state.terminal_test():
+        action = random.choice(game_state.actions())
+        if played is not None:
+            loc = game_state.locs[game_state.player()]
+            played.append(action if loc is None else loc + action)
+        game_state = game_state.result(action)
+    return 1. if game_state.utility(player_id) > 0 else -1.
+
+
+def _root_search(args):
+    """ Worker of root_parallel_search: search an independent tree """
+    game_state, search_seconds, seed = args
+    random.seed(seed)
+    start_time = time.perf_counter()
+    tree = SearchTree(game_state)
+    playouts = tree.search(start_time + search_seconds)
+    root_children = [(tree.action[child], tree.visits[child], tree.q_value[child]) for child in tree.children(0)]
+    return os.getpid(), root_children, playouts, time.perf_counter() - start_time
+
+
+def _rollouts(args):
+    """ Worker of leaf_parallel_search: play several rollouts from one leaf """
+    game_state, playouts, seed = args
+    random.seed(seed)
+    start_time = time.perf_counter()
+    result = sum(rollout(game_state) for _ in range(playouts))
+    return os.getpid(), result, playouts, time.perf_counter() - start_time
+
+
+def _worker_stats(results):
+    # results are (pid, playouts, busy seconds) of all tasks
+    playouts = defaultdict(int)
+    seconds = defaultdict(float)
+    for pid, worker_playouts, worker_seconds in results:
+        playouts[pid] += worker_playouts
+        seconds[pid] += worker_seconds
+    return [{"pid": pid, "playouts": playouts[pid],
+             "playouts_per_second": playouts[pid] / seconds[pid] if seconds[pid] else 0.}
+            for pid in sorted(playouts)]
+
+
+def root_parallel_search(pool, processes, game_state, search_seconds):
+    """ Search one independent tree per process for search_seconds and
+    merge the visit counts of the root children
+
+    Return the action with the most visits over all trees and the
+    playout statistics of every worker.
+    """
+    tasks = [(game_state, search_seconds, random.getrandbits(32)) for _ in range(processes)]
+    results = pool.map(_root_search, tasks)
+
+    visits = defaultdict(int)
+    for _, root_children, _, _ in results:
+        for action, child_visits, _ in root_children:
+            visits[action] += child_visits
+
+    if not visits:
+        # no worker finished a playout in time
+        action = SearchTree(game_state).best_action()
+    else:
+        best_action = max(visits, key=visits.get)
+        action = next(a for a in game_state.actions() if a == best_action)
+    return action, _worker_stats((pid, playouts, seconds) for pid, _, playouts, seconds in results)
+
+
+def leaf_parallel_search(pool, processes, tree, deadline, playouts_per_leaf=1):
+    """ Grow the tree in this process and run the rollouts of the selected
+    leaves in the pool until time.perf_counter() passes the deadline
+
+    Every round selects _LEAVES_PER_TASK leaves per process and sends them
+    with a single map call, so the cost of a round trip to the workers is
+    shared by many rollouts. Each selected leaf gets a virtual loss until
+    its results come back, which steers the later selections of the round
+    to other leaves.
+
+    Return the playout statistics of every worker.
+    """
+    results = []
+    while time.perf_counter() < deadline:
+        leaves = []
+        for _ in range(processes * _LEAVES_PER_TASK):
+            node, game_state = tree.select()
+            tree.backpropagate(node, -1.)
+            leaves.append((node, game_state))
+
+        tasks = [(game_state, playouts_per_leaf, random.getrandbits(32)) for _, game_state in leaves]
+        for (node, _), (pid, result, playouts, seconds) in zip(leaves, pool.map(_rollouts, tasks, _LEAVES_PER_TASK)):
+            # take the virtual loss back and add the real results
+            tree.backpropagate(node, 1., -1)
+            tree.backpropagate(node, result, playouts)
+            results.append((pid, playouts, seconds))
+    return _worker_stats(results)
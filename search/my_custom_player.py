@@ -1,101 +1,95 @@
-import random, math, time
+import os, random, math, sys, threading, time
+from multiprocessing import Pool, cpu_count, get_context
 from sample_players import DataPlayer
-from isolation import DebugState
-
-# board
-_WIDTH = 11
-_HEIGHT = 9
+from adversarial import AlphaBetaSearch, SearchTimeout
+from bitboard import popcount
+from endgame import EndgameSolver
+import evaluators
+import heuristics
+from mcts import SearchTree, leaf_parallel_search, root_parallel_search
+from move_ordering import MoveOrdering
+from opening_book import BOOK_DEPTH, BOOK_PATH, OpeningBook, book_move
+from transposition import TranspositionTable
+
+# time limit of the caller for a move in ms
+_SEARCH_TIME = 150
+# search of get_action unless another one is given to the constructor, see CustomPlayer.ALGORITHMS
+_ALGORITHM = "alpha_beta"
 
 # minimax with alpha-beta-pruning
-_SEARCH_DEPTH = 5
-_CENTER = [5, 4]
+_TABLE_SIZE = 2 ** 18
+# share of the time limit iterative deepening may use
+_DEEPENING_TIME_WITH_SAFETY = 0.8
+# half width of the aspiration window around the score of the previous depth
+_ASPIRATION_WINDOW = 2
+# search budget of the endgame solver at the root, about 15 ms
+_ENDGAME_ROOT_NODES = 5000
+# a pondering search that is never stopped gives up after this many ms
+_MAX_PONDER_TIME = 10000
+# only table entries at least this deep are sent back by the pondering process,
+# the shallow ones are cheaper to search again than to copy
+_MIN_PONDER_ENTRY_DEPTH = 2
 
 # monte carlo tree search
-_EXPLORATION_WEIGHT = 1.7
-_SEARCH_TIME = 150
 _SEARCH_TIME_WITH_SAFETY = 0.5
+# bound of the subtree kept in self.context for the next turn
+_MAX_REUSED_NODES = 5000
+_MIN_REUSED_VISITS = 2
+# worker processes of the parallel monte carlo tree search; starting a pool
+# costs about 3 ms per process, which a forked move pays every time
+_MCTS_PROCESSES = min(cpu_count(), 8)
 
 
-# Representation of a node for the monte carlo tree search.
-# Provides several helper methods to traverse through the tree.
-class Node:
-    def __init__(self, gameState, action=None, parent=None):
-        self.action = action
-        self.parentNode = parent
-        self.gameState = gameState
-        self.childNodes = []
-        self.qValue = 0
-        self.numberOfVisits = 0
-        self.openActions = gameState.actions()
-
-    def is_fully_expanded(self):
-        return len(self.openActions) == 0
-
-    def expand(self):
-        move = random.choice(self.openActions)
-        self.openActions.remove(move)
-        next_state = self.gameState.result(move)
-        child_node = Node(next_state, move, self)
-        self.childNodes.append(child_node)
-
-        return child_node
-
-    def best_child(self):
-        max_uct = float("-inf")
-        best_child = None
-
-        for childNode in self.childNodes:
-            uct = (childNode.qValue / childNode.numberOfVisits) + _EXPLORATION_WEIGHT * math.sqrt(
-                2 * math.log(self.numberOfVisits) / childNode.numberOfVisits)
-
-            if uct > max_uct:
-                max_uct = uct
-                best_child = childNode
-
-        return best_child
-
-    # default policy
-    def rollout(self):
-        current_game_state = self.gameState
-
-        while Node.non_terminal(current_game_state):
-            next_action = Node.rollout_policy(current_game_state.actions())
-            current_game_state = current_game_state.result(next_action)
-
-        return self.result(current_game_state)
-
-    def backpropagate(self, result):
-        self.numberOfVisits += 1.
-        self.qValue += result
-
-        result = -result
-        if self.parentNode:
-            self.parentNode.backpropagate(result)
+# the pondering process has to start from a copy of the player's tables
+_FORK = get_context("fork")
 
-    @staticmethod
-    def non_terminal(game_state):
-        return not game_state.terminal_test()
 
-    @staticmethod
-    def rollout_policy(actions):
-        return random.choice(actions)
+def _enabled(flag):
+    """ Return True for a flag given as bool or as a string like "1", "true" or "yes" """
+    return str(flag).lower() in ("1", "true", "yes")
 
-    @staticmethod
-    def result(game_state):
-        if Node.is_a_win(game_state):
-            return 1.
-        elif Node.is_a_loss(game_state):
-            return -1.
-        else:
-            return 0
 
-    @staticmethod
-    def is_a_win(game_state):
-        return game_state.utility(1 - game_state.player()) == float('inf')
+def _ponder(connection, parent_connection, engine, game_state):
+    """ Body of the pondering process: deepen the search of game_state until
+    the parent says stop (or goes away), then send it the best move, the
+    depth reached and, if asked for, the deeper entries of the table
+    """
+    parent_connection.close()
+    os.nice(19)
+    # the stop message is read by a thread, let it take over quickly
+    sys.setswitchinterval(1e-4)
+    table = engine.table
+    table.new_search()
+    table.journal = []
+    engine.deadline = time.perf_counter() + _MAX_PONDER_TIME / 1000
+    reply = []
+
+    def wait_for_stop():
+        try:
+            reply.append(connection.recv())
+        except EOFError:
+            pass
+        engine.deadline = 0
 
-    @staticmethod
-    def is_a_loss(game_state):
-        return game_state.utility(1 - game_state.player()) == float('-inf')
+    listener = threading.Thread(target=wait_for_stop, daemon=True)
+    listener.start()
+    move, depth = None, 0
+    for next_depth in range(1, popcount(game_state.board) + 1):
+        try:
+            next_move = engine.search(game_state, next_depth)
+        except SearchTimeout:
+            break
+        engine.principal_variation(game_state, next_depth)
+        move, depth = next_move, next_depth
+        if abs(engine.last_score) == float("inf"):
+            break
+    listener.join()
+    if reply:
+        entries = table.entries(table.journal, _MIN_PONDER_ENTRY_DEPTH) if reply[0] else []
+        try:
+            connection.send((move, depth, entries))
+        except OSError:
+            pass
 
 
 class CustomPlayer(DataPlayer):
@@ -116,6 +110,60 @@ class CustomPlayer(DataPlayer):
     **********************************************************************
     """
 
+    ALGORITHMS = ("alpha_beta", "mcts", "mcts_root", "mcts_leaf")
+    # algorithms that start a process pool of their own
+    POOL_ALGORITHMS = ("mcts_root", "mcts_leaf")
+
+    @staticmethod
+    def starts_processes(algorithm=_ALGORITHM, ponder=False, **kwargs):
+        """ Return True if a player created with these arguments starts
+        processes of its own (a pool or the pondering process)
+        """
+        return algorithm in CustomPlayer.POOL_ALGORITHMS or _enabled(ponder)
+
+    def __init__(self, player_id, evaluator=None, algorithm=_ALGORITHM, ponder=False):
+        super().__init__(player_id)
+        if algorithm not in CustomPlayer.ALGORITHMS:
+            raise ValueError("Unknown search algorithm: {}".format(algorithm))
+        self.algorithm = algorithm
+        # search the predicted position on the opponent's time, see start_pondering();
+        # a string like "1" or "true" as given by the tournament agent specs works too.
+        # Off by default: the project harness runs every move in a process of its own,
+        # which ends the pondering process together with the move
+        self.ponder = _enabled(ponder)
+        # heuristic of the alpha-beta search, a name or spec understood by evaluators.get()
+        self.evaluator = evaluators.get(evaluator)
+        # exact values of positions in which the players are separated
+        self.endgame = EndgameSolver()
+        # statistics of self-play openings, see book_builder.py
+        self.book = OpeningBook(BOOK_PATH) if os.path.exists(BOOK_PATH) else None
+        # results of the alpha-beta search, keyed by hash(state)
+        self.table = TranspositionTable(_TABLE_SIZE)
+        self.move_ordering = MoveOrdering()
+        # alpha-beta with principal variation search, see adversarial.py
+        self.search_engine = AlphaBetaSearch(player_id, self.score, self.table, self.move_ordering, pvs=True)
+        self.time_limit = _SEARCH_TIME
+        self.nodes = 0
+        self.nodes_per_second = 0.
+        self.depth_reached = 0
+        self.depth_nodes = []
+        self.last_score = 0
+        self.aspiration_failures = 0
+        self.principal_variation = []
+        # visits of the monte carlo tree inherited from the previous turn
+        self.inherited_visits = 0
+        # process pool of the parallel monte carlo tree search, created on first use
+        self._pool = None
+        self.worker_stats = []
+        # process searching the position after the predicted reply of the opponent
+        self._ponder_process = None
+        self._ponder_connection = None
+        self._ponder_state = None
+        # depth reached by the last pondering search that was stopped
+        self.ponder_depth = 0
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+
     def get_action(self, state):
         """ Employ an adversarial search technique to choose an action
         available in the current state calls self.queue.put(ACTION) at least
@@ -139,45 +187,334 @@ class CustomPlayer(DataPlayer):
         # EXAMPLE: choose a random move without any search--this function MUST
         #          call self.queue.put(ACTION) at least once before time expires
         #          (the timer is automatically managed for you)
+        start_time = time.perf_counter()
+        self.reset_search_stats()
+        pondered_move = self.stop_pondering(state)
+        if state.ply_count < BOOK_DEPTH and self.book is not None:
+            action = book_move(self.book, state)
+            if action is not None:
+                self.queue.put(action)
+                return
         if state.ply_count < 2:
             self.queue.put(random.choice(state.actions()))
+            return
+        if self.solve_endgame(state):
+            return
+
+        time_limit = self.time_limit - 1000 * (time.perf_counter() - start_time)
+        if self.algorithm == "alpha_beta":
+            action = self.iterative_deepening(state, time_limit, pondered_move)
+            if self.ponder:
+                self.start_pondering(state, action)
+        elif self.algorithm == "mcts":
+            self.queue.put(self.monte_carlo_tree_search_with_reuse(state, time_limit))
         else:
-            best_action = self.alpha_beta_search(state, _SEARCH_DEPTH)
-            # best_action = CustomPlayer.monte_carlo_tree_search(state)
+            self.queue.put(self.parallel_monte_carlo_tree_search(state, time_limit, self.algorithm[5:]))
 
-            self.queue.put(best_action)
+    def solve_endgame(self, game_state):
+        """ Put the first move of the longest path and return True if the
+        players are separated and the endgame solver decides the position
+        """
+        solution = self.endgame.solve(game_state, _ENDGAME_ROOT_NODES)
+        if solution is None or solution[1] is None:
+            return False
+        self.last_score, action = solution
+        self.principal_variation = [action]
+        self.queue.put(action)
+        return True
+
+    def iterative_deepening(self, game_state, time_limit=None, first_move=None):
+        """ Run alpha-beta searches with increasing depth and put the best
+        move of every completed depth into the queue
+
+        The principal variation of each depth is searched first in the
+        next one, with an aspiration window around its score. A new depth
+        is only started if the node rate measured so far says it can finish
+        within the time budget; a depth that runs out of time anyway is
+        abandoned with SearchTimeout. first_move is put into the queue
+        before the first depth finishes, if it is legal.
+        """
+        start_time = time.perf_counter()
+        time_limit = self.time_limit if time_limit is None else time_limit
+        engine = self.search_engine
+        engine.new_search()
+        engine.deadline = start_time + time_limit * _DEEPENING_TIME_WITH_SAFETY / 1000
+        self.nodes = 0
+        self.aspiration_failures = 0
+        self.depth_reached = 0
+        self.depth_nodes = []
+        self.principal_variation = []
+
+        actions = game_state.actions()
+        best_move = first_move if first_move in actions else actions[0]
+        # put a legal move right away in case not even depth 1 finishes
+        self.queue.put(best_move)
+
+        previous_nodes = 0
+        open_cells = popcount(game_state.board)
+        for depth in range(1, open_cells + 1):
+            nodes_before = self.nodes
+            try:
+                best_move = self.aspiration_search(game_state, depth)
+            except SearchTimeout:
+                break
+            finally:
+                self.nodes = engine.nodes
+            self.queue.put(best_move)
+            self.depth_reached = depth
+            self.depth_nodes.append(self.nodes - nodes_before)
+            self.principal_variation = engine.principal_variation(game_state, depth)
+
+            # stop when the game is decided, there is nothing to gain from deeper searches
+            if abs(self.last_score) == float("inf"):
+                break
+
+            now = time.perf_counter()
+            self.nodes_per_second = self.nodes / max(now - start_time, 1e-6)
+            depth_nodes = self.nodes - nodes_before
+            # the next depth costs about the effective branching factor times this one
+            branching_factor = depth_nodes / previous_nodes if previous_nodes else len(actions)
+            if now + depth_nodes * branching_factor / self.nodes_per_second > engine.deadline:
+                break
+            previous_nodes = depth_nodes
+
+        engine.deadline = None
+        return best_move
 
-    @staticmethod
-    def monte_carlo_tree_search(game_state=None, search_time=_SEARCH_TIME):
-        root_node = Node(game_state)
+    def reset_search_stats(self):
+        """ Reset the counters of the last search, called by every get_action()
+        so that a move from the book reports no search
+        """
+        self.nodes = 0
+        self.nodes_per_second = 0.
+        self.depth_reached = 0
+        self.depth_nodes = []
+        self.aspiration_failures = 0
+        self.principal_variation = []
+        self.worker_stats = []
+        self.search_engine.reset_stats()
+
+    def search_stats(self):
+        """ Return the counters of the last get_action() call
+
+        The counters of the move ordering, the evaluator, the endgame solver
+        and the transposition table are totals since the player was created.
+        """
+        stats = {
+            "depth": self.depth_reached,
+            "nodes": self.nodes,
+            "nodes_per_second": self.nodes_per_second,
+            # nodes of the deepest completed search = b ** depth
+            "effective_branching_factor":
+                self.depth_nodes[-1] ** (1 / self.depth_reached) if self.depth_nodes else 0.,
+            "depth_nodes": self.depth_nodes,
+            "pvs_researches": self.search_engine.researches,
+            "aspiration_failures": self.aspiration_failures,
+            "ponder_depth": self.ponder_depth,
+            "ponder_hits": self.ponder_hits,
+            "ponder_misses": self.ponder_misses,
+        }
+        stats.update(self.move_ordering.stats())
+        stats.update(self.evaluator.stats())
+        stats.update(self.endgame.stats())
+        stats.update({"table_" + key: value for key, value in self.table.stats().items()})
+        return stats
+
+    def monte_carlo_tree_search_with_reuse(self, game_state, search_time=_SEARCH_TIME):
+        """ Run the monte carlo tree search from the subtree kept from the
+        previous turn and keep the subtree of the chosen move for the next one
+
+        self.context holds the tree of the state after our last move. If the
+        opponent's reply was already expanded there, its subtree becomes the
+        new tree and all visits below it are inherited.
+        """
+        previous_tree = self.context.get("mcts") if isinstance(self.context, dict) else None
+        tree = None
+        if previous_tree is not None:
+            node = previous_tree.child_with_state(0, previous_tree.root_state, game_state)
+            if node is not None:
+                tree = previous_tree.subtree(node, game_state, _MAX_REUSED_NODES, _MIN_REUSED_VISITS)
+        if tree is None:
+            tree = SearchTree(game_state)
+        self.inherited_visits = tree.visits[0]
+
+        start_time = time.perf_counter()
+        action = CustomPlayer.monte_carlo_tree_search(game_state, search_time, tree)
+        self.record_playouts(tree.visits[0] - self.inherited_visits, time.perf_counter() - start_time, tree)
+
+        # the context is sent along with the move, so it has to be set before the move is put
+        chosen_node = next(child for child in tree.children(0) if tree.action[child] == action)
+        if not isinstance(self.context, dict):
+            self.context = {}
+        self.context["mcts"] = tree.subtree(chosen_node, game_state.result(action),
+                                            _MAX_REUSED_NODES, _MIN_REUSED_VISITS)
+        return action
+
+    def parallel_monte_carlo_tree_search(self, game_state, search_time=_SEARCH_TIME, mode="root"):
+        """ Run the monte carlo tree search on _MCTS_PROCESSES processes
+
+        mode "root" searches independent trees in every process and merges
+        the visits of the root children, mode "leaf" grows a single tree and
+        runs the rollouts of batches of selected leaves in the processes. Both
+        keep to the same time budget as monte_carlo_tree_search; the playouts
+        per second of every worker are kept in self.worker_stats.
+
+        The pool is kept for later moves of the same player object; call
+        close() when the player is not needed anymore. The harness runs every
+        get_action() in a new process, there the pool (and its start-up time)
+        is paid for on every move. The move of the best prior is put first
+        and returned if starting the pool leaves no time to search.
+        """
+        start_time = time.perf_counter()
+        fallback_action = SearchTree(game_state).best_action()
+        self.queue.put(fallback_action)
+        if self._pool is None:
+            self._pool = Pool(_MCTS_PROCESSES)
+        search_seconds = math.ceil(search_time * _SEARCH_TIME_WITH_SAFETY) / 1000
+        remaining_seconds = search_seconds - (time.perf_counter() - start_time)
+        if remaining_seconds <= 0:
+            self.worker_stats = []
+            self.record_playouts(0, time.perf_counter() - start_time)
+            return fallback_action
+
+        if mode == "root":
+            action, self.worker_stats = root_parallel_search(
+                self._pool, _MCTS_PROCESSES, game_state, remaining_seconds)
+            playouts = sum(stats["playouts"] for stats in self.worker_stats)
+            self.record_playouts(playouts, time.perf_counter() - start_time)
+            return action
+        elif mode == "leaf":
+            tree = SearchTree(game_state)
+            self.worker_stats = leaf_parallel_search(
+                self._pool, _MCTS_PROCESSES, tree, start_time + search_seconds)
+            self.record_playouts(tree.visits[0], time.perf_counter() - start_time, tree)
+            return tree.best_action()
+        raise ValueError("Unknown parallel search mode: {}".format(mode))
+
+    def record_playouts(self, playouts, seconds, tree=None):
+        """ Keep the counters of a monte carlo tree search for search_stats()
+
+        The playouts count as nodes and the length of the most visited line
+        of the tree as the depth reached.
+        """
+        self.nodes = playouts
+        self.nodes_per_second = playouts / max(seconds, 1e-6)
+        self.principal_variation = tree.principal_variation() if tree is not None else []
+        self.depth_reached = len(self.principal_variation)
+        self.depth_nodes = []
+
+    def start_pondering(self, game_state, action):
+        """ Search the position after our action and the predicted reply of
+        the opponent in a background process until the next get_action()
+
+        The reply is the second move of the principal variation (or the
+        best move stored for the position after our action). The process is
+        forked, so it starts from a copy of the transposition table. It runs
+        at the lowest priority and can't take the GIL of this process, so an
+        opponent timed on the same core keeps most of its CPU time. If the
+        opponent plays the predicted move, stop_pondering() copies the deeper
+        entries of the pondering search into the table and the next
+        iterative deepening gets through the depths pondered already with
+        table cutoffs.
+
+        Pondering only pays off if the opponent's move is timed while this
+        player object lives on, like in the in-process tournament. The
+        project harness runs every get_action() in a process of its own that
+        ends right after the move, and the pondering process with it. A
+        daemonic process (a worker of a pool) can't start one, there the
+        player doesn't ponder.
+        """
+        if _FORK.current_process().daemon:
+            return
+        state = game_state.result(action)
+        if state.terminal_test():
+            return
+        if self.principal_variation[:1] == [action] and len(self.principal_variation) > 1:
+            reply = self.principal_variation[1]
+        else:
+            entry = self.table.lookup(hash(state))
+            reply = entry.move if entry else None
+        if reply not in state.actions():
+            return
+
+        state = state.result(reply)
+        if state.terminal_test():
+            return
+        engine = AlphaBetaSearch(self.player_id, self.score, self.table, self.move_ordering, pvs=True)
+        self._ponder_state = state
+        self._ponder_connection, connection = _FORK.Pipe()
+        self._ponder_process = _FORK.Process(target=_ponder, args=(connection, self._ponder_connection, engine, state),
+                                             daemon=True)
+        self._ponder_process.start()
+        connection.close()
+
+    def stop_pondering(self, game_state=None):
+        """ Stop the pondering process and return its best move if it
+        pondered game_state, else None
+
+        On a hit the entries of the pondering search are merged into the
+        transposition table.
+        """
+        if self._ponder_process is None:
+            return None
+        connection, self._ponder_connection = self._ponder_connection, None
+        process, self._ponder_process = self._ponder_process, None
+        pondered_state, self._ponder_state = self._ponder_state, None
+        try:
+            connection.send(game_state == pondered_state)
+            move, self.ponder_depth, entries = connection.recv()
+        except (EOFError, OSError):
+            move, entries = None, []
+        connection.close()
+        process.join()
+        if game_state is None:
+            return None
+        if game_state != pondered_state:
+            self.ponder_misses += 1
+            return None
+        self.ponder_hits += 1
+        self.table.merge(entries)
+        return move
+
+    def close(self):
+        """ Stop pondering, shut down the process pool of the parallel
+        monte carlo tree search and close the opening book
+        """
+        self.stop_pondering()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
 
-        start_time = time.time()
+    @staticmethod
+    def monte_carlo_tree_search(game_state=None, search_time=_SEARCH_TIME, tree=None):
+        if tree is None:
+            tree = SearchTree(game_state)
 
         # remain a little safety
         search_time = math.ceil(search_time * _SEARCH_TIME_WITH_SAFETY)
+        tree.search(time.perf_counter() + search_time / 1000)
 
-        while (time.time() - start_time) * 1000 <= search_time:
-            leaf_node = CustomPlayer.traverse(root_node)
-            simulation_result = leaf_node.rollout()
-            leaf_node.backpropagate(simulation_result)
-
-        best_child = root_node.best_child()
-        return best_child.action
-
-    # tree policy
-    @staticmethod
-    def traverse(node):
-        node_to_process = node
+        return tree.best_action()
 
-        while Node.non_terminal(node_to_process.gameState):
-            if not node_to_process.is_fully_expanded():
-                return node_to_process.expand()
-            else:
-                node_to_process = node_to_process.best_child()
-
-        return node_to_process
-
-    def alpha_beta_search(self, game_state, depth):
+    def aspiration_search(self, game_state, depth):
+        """ Search the depth with a narrow window around the score of the
+        previous depth and repeat with the full window if the score falls
+        outside of it
+        """
+        if depth > 1 and abs(self.last_score) != float("inf"):
+            alpha = self.last_score - _ASPIRATION_WINDOW
+            beta = self.last_score + _ASPIRATION_WINDOW
+            best_move = self.alpha_beta_search(game_state, depth, alpha, beta)
+            if alpha < self.last_score < beta:
+                return best_move
+            self.aspiration_failures += 1
+        return self.alpha_beta_search(game_state, depth)
+
+    def alpha_beta_search(self, game_state, depth, alpha=float("-inf"), beta=float("inf")):
         """ Return the move along a branch of the game tree that
         has the best possible value.  A move is a pair of coordinates
         in (column, row) order corresponding to a legal move for
@@ -185,235 +522,43 @@ class CustomPlayer(DataPlayer):
 
         You can ignore the special case of calling this function
         from a terminal state.
-        """
-        alpha = float("-inf")
-        beta = float("inf")
-        best_score = float("-inf")
-        best_move = None
-        for a in game_state.actions():
-            v = self.min_value(game_state.result(a), alpha, beta, depth - 1)
-            alpha = max(alpha, v)
-
-            if v > best_score:
-                best_score = v
-                best_move = a
-            elif best_move is None:
-                # take at least an action to don't get stuck
-                best_score = v
-                best_move = a
-
-        return best_move
 
-    def min_value(self, game_state, alpha, beta, depth):
-        """ Return the value for a win (+1) if the game is over,
-        otherwise return the minimum value over all legal child
-        nodes.
+        The search stops at the first move that reaches beta, so with a
+        finite window the move is only reliable if alpha < self.last_score < beta.
         """
-        if game_state.terminal_test():
-            return game_state.utility(self.player_id)
-
-        if depth <= 0:
-            return self.score(game_state)
-
-        v = float("inf")
-
-        for a in game_state.actions():
-            v = min(v, self.max_value(game_state.result(a), alpha, beta, depth - 1))
-            if v <= alpha:
-                return v
-            beta = min(beta, v)
-
-        return v
-
-    def max_value(self, game_state, alpha, beta, depth):
-        """ Return the value for a loss (-1) if the game is over,
-        otherwise return the maximum value over all legal child
-        nodes.
-        """
-        if game_state.terminal_test():
-            return game_state.utility(self.player_id)
-
-        if depth <= 0:
-            return self.score(game_state)
-
-        v = float("-inf")
-
-        for a in game_state.actions():
-            v = max(v, self.min_value(game_state.result(a), alpha, beta, depth - 1))
-            if v >= beta:
-                return v
-            alpha = max(alpha, v)
-
-        return v
+        best_move = self.search_engine.search(game_state, depth, alpha, beta)
+        self.last_score = self.search_engine.last_score
+        return best_move
 
     def score(self, state):
-        own_loc = state.locs[self.player_id]
-        opp_loc = state.locs[1 - self.player_id]
-
-        # diff_liberties
-        return self.diff_liberties(state)
-
-        # own center
-        # return 5 - CustomPlayer.center_field_heuristic(own_loc, state)
-
-        # opp border
-        # return CustomPlayer.center_field_heuristic(opp_loc, state) - 5
-
-        # own center + 2 * diff_liberties
-        # return 5 - CustomPlayer.center_field_heuristic(own_loc, state) + 2 * self.diff_liberties(state)
-
-        # own center + diff_liberties
-        # return 5 - CustomPlayer.center_field_heuristic(own_loc, state) + self.diff_liberties(state)
-
-        # opp border - own center
-        # return CustomPlayer.center_field_heuristic(opp_loc, state) - CustomPlayer.center_field_heuristic(own_loc, state)
-
-        # opp border - own center + diff_liberties
-        # return CustomPlayer.center_field_heuristic(opp_loc, state) - CustomPlayer.center_field_heuristic(own_loc, state) + self.diff_liberties(state)
-
-        # own free fields
-        # return CustomPlayer.empty_surrounding_fields_heuristic(own_loc, state)
-
-        # own free fields - opp free fields
-        # return CustomPlayer.empty_surrounding_fields_heuristic(own_loc, state) - CustomPlayer.empty_surrounding_fields_heuristic(opp_loc, state)
-
-        # own free fields + own center
-        # return self.empty_surrounding_fields_heuristic(own_loc, state) + 6 - self.center_field_heuristic(own_loc)
-
-        # minimize distance to opp
-        # return self.minimize_distance_to_opponent_heuristic(state)
-
-        # maximize distance to opp
-        # return self.maximize_distance_to_opponent_heuristic(state)
-
-        # biggest quadrant
-        # return CustomPlayer.biggest_quadrant_heuristic(own_loc, state)
-
-        # own biggest - opp biggest
-        # return CustomPlayer.biggest_quadrant_heuristic(own_loc, state) - CustomPlayer.biggest_quadrant_heuristic(opp_loc, state)
+        # separated endgames are scored exactly, if the solver is quick enough
+        value = self.endgame.value(state, self.player_id)
+        if value is not None:
+            return value
+        return self.evaluator(state.board, state.locs[self.player_id], state.locs[1 - self.player_id])
 
     def diff_liberties(self, state):
-        own_loc = state.locs[self.player_id]
-        opp_loc = state.locs[1 - self.player_id]
-        own_liberties = state.liberties(own_loc)
-        opp_liberties = state.liberties(opp_loc)
-
-        return len(own_liberties) - len(opp_liberties)
+        return heuristics.diff_liberties(state.board, state.locs[self.player_id], state.locs[1 - self.player_id])
 
     def minimize_distance_to_opponent_heuristic(self, game_state):
         own_loc = game_state.locs[self.player_id]
         opp_loc = game_state.locs[1 - self.player_id]
-
-        debug_state = DebugState.from_state(game_state)
-        own_xy_position = debug_state.ind2xy(own_loc)
-        opp_xy_position = debug_state.ind2xy(opp_loc)
-
-        distance = CustomPlayer.xy_distance(own_xy_position, opp_xy_position)
-
-        # max distance is 9, so calculate a score which is positive for lower distance and negative for bigger one
-        return 9 - distance
+        return heuristics.approach_opponent(game_state.board, own_loc, opp_loc)
 
     def maximize_distance_to_opponent_heuristic(self, game_state):
         own_loc = game_state.locs[self.player_id]
         opp_loc = game_state.locs[1 - self.player_id]
-
-        debug_state = DebugState.from_state(game_state)
-        own_xy_position = debug_state.ind2xy(own_loc)
-        opp_xy_position = debug_state.ind2xy(opp_loc)
-
-        distance = CustomPlayer.xy_distance(own_xy_position, opp_xy_position)
-
-        # max distance is 18, so calculate a score which is positive for bigger distance and negative for lower one
-        return distance - 9
+        return heuristics.avoid_opponent(game_state.board, own_loc, opp_loc)
 
     @staticmethod
     def center_field_heuristic(position, game_state):
-        xy_position = DebugState.from_state(game_state).ind2xy(position)
-
-        return CustomPlayer.xy_distance(xy_position, _CENTER)
+        return heuristics.CENTER_DISTANCE[position]
 
     @staticmethod
     def empty_surrounding_fields_heuristic(position, game_state):
-        empty_fields = 0
-
-        for x_modifier in range(-2, 3):
-            for y_modifier in range(-2, 3):
-                # board width is 11 + 2 = 13 because of the boarders left and right, therefore the modifier is n*13
-                modifier = x_modifier + (_WIDTH + 2) * y_modifier
-                field_pos = position + modifier
-
-                if field_pos >= 0:
-                    empty_fields += CustomPlayer.check_if_field_is_empty(field_pos, game_state)
-
-        print("got ", empty_fields, " for position ", position)
-        return empty_fields
+        return heuristics.surrounding_fields(game_state.board, position)
 
     @staticmethod
     def biggest_quadrant_heuristic(position, game_state):
-        debug_state = DebugState.from_state(game_state)
-
-        xy_position = debug_state.ind2xy(position)
-
-        q1_xy_modifiers = CustomPlayer.count_modifiers_for_q1(xy_position)
-        q1_empty_fields = CustomPlayer.count_empty_fields(position, game_state, q1_xy_modifiers)
-
-        q2_xy_modifiers = CustomPlayer.count_modifiers_for_q2(xy_position)
-        q2_empty_fields = CustomPlayer.count_empty_fields(position, game_state, q2_xy_modifiers)
-
-        q3_xy_modifiers = CustomPlayer.count_modifiers_for_q3(xy_position)
-        q3_empty_fields = CustomPlayer.count_empty_fields(position, game_state, q3_xy_modifiers)
-
-        q4_xy_modifiers = CustomPlayer.count_modifiers_for_q4(xy_position)
-        q4_empty_fields = CustomPlayer.count_empty_fields(position, game_state, q4_xy_modifiers)
-
         # max empty fields is nearly 100, so calculate a score which is positive for bigger distance and negative for lower one
-        return max(q1_empty_fields, q2_empty_fields, q3_empty_fields, q4_empty_fields) - 40
-
-    @staticmethod
-    def count_empty_fields(position, game_state, xy_modifiers):
-        empty_fields = 0
-
-        for x_modifier in range(0, xy_modifiers[0]):
-            for y_modifier in range(0, xy_modifiers[1]):
-                modifier = x_modifier + (_WIDTH + 2) * y_modifier
-                field_pos = position + modifier
-
-                empty_fields += CustomPlayer.check_if_field_is_empty(field_pos, game_state)
-
-        return empty_fields
-
-    @staticmethod
-    def check_if_field_is_empty(position, game_state):
-        try:
-            # if bit shift leads to the same number the field is empty
-            if game_state.board & (1 << position):
-                return 1
-        except IndexError:
-            # do nothing
-            pass
-
-        return 0
-
-    @staticmethod
-    def count_modifiers_for_q1(xy_position):
-        # compute Q1: 11-x <-> x, 9-y <-> y
-        return [_WIDTH - xy_position[0], _HEIGHT - xy_position[1]]
-
-    @staticmethod
-    def count_modifiers_for_q2(xy_position):
-        # compute Q2: x <-> x+1, 9-y <-> y
-        return [xy_position[0] + 1, _HEIGHT - xy_position[1]]
-
-    @staticmethod
-    def count_modifiers_for_q3(xy_position):
-        # compute Q3: x <-> x+1, y <-> y+1
-        return [xy_position[0] + 1, xy_position[1] + 1]
-
-    @staticmethod
-    def count_modifiers_for_q4(xy_position):
-        # compute Q4: 11-x <-> x, y <-> y+1
-        return [_WIDTH - xy_position[0] + 1, xy_position[1] + 1]
-
-    @staticmethod
-    def xy_distance(position_1, position_2):
-        return abs(position_1[0] - position_2[0]) + abs(position_1[1] - position_2[1])
+        return heuristics.biggest_quadrant(game_state.board, position) - 40
@@ -1,31 +1,118 @@
 
+import os
 import random
+import sys
+from collections import defaultdict, Counter
 
-from gamestate import GameState
+from gamestate import BitboardGameState
+
+# the persistent opening book is shared with the other search exercises
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from opening_book import OpeningBook, action_code, hashable_key, lower_confidence_bound, parallel_counts
 
 NUM_ROUNDS = 10
 
-def build_table(num_rounds=NUM_ROUNDS):
-    # Builds a table that maps from game state -> action
-    # by choosing the action that accumulates the most
-    # wins for the active player. (Note that this uses
-    # raw win counts, which are a poor statistic to
-    # estimate the value of an action; better statistics
-    # exist.)
-    from collections import defaultdict, Counter
-    book = defaultdict(Counter)
-    for _ in range(num_rounds):
-        state = GameState()
-        build_tree(state, book)
-    return {k: max(v, key=v.get) for k, v in book.items()}
-
-
-def build_tree(state, book, depth=2):
+def build_table(num_rounds=NUM_ROUNDS, path=None, processes=1, report=None):
+    # Builds a table that maps from game state -> action,
+    # keyed by GameState.hashable like the table of the
+    # quiz, see build_canonical_table for the arguments.
+    #
+    # Mirror images of a position share their statistics,
+    # every position that can occur in a game and is the
+    # mirror image of a position in the canonical table
+    # gets the action mapped to its orientation.
+    return mirror_table(build_canonical_table(num_rounds, path, processes, report))
+
+
+def build_canonical_table(num_rounds=NUM_ROUNDS, path=None, processes=1, report=None):
+    # Builds a table that maps from canonical game state
+    # -> action by choosing the action with the highest
+    # lower confidence bound of its win rate for the
+    # active player, so an action that won once in one
+    # visit doesn't beat one that won 60 of 100 visits.
+    #
+    # With a path the visits and wins are added to the
+    # persistent book in that file (see opening_book.py),
+    # so the statistics accumulate over runs instead of
+    # being regenerated every time.
+    #
+    # With processes > 1 the rounds are played in shards
+    # on a process pool (processes=None uses all cores)
+    # and the Counters of the shards are merged; pass
+    # opening_book.print_progress as report to see the
+    # rounds per second.
+    #
+    # Mirror images of a position share their statistics:
+    # the table is keyed by state.canonical_hashable and
+    # its actions are in the orientation of that key, so
+    # look a BitboardGameState up with
+    #   key, symmetry = state.canonical_hashable, state.canonical[1]
+    #   action = state.transform_action(book[key], symmetry)
+    if processes == 1 and report is None:
+        visits, wins = build_counts(num_rounds)
+    else:
+        visits, wins = parallel_counts(build_counts, num_rounds, processes, report=report)
+
+    if path is not None:
+        with OpeningBook(path, writable=True) as book:
+            book.update(*book_counts(visits, wins))
+            for hashable, action in visits:
+                visits[hashable, action], wins[hashable, action] = book.lookup(hashable_key(hashable), action)
+
+    actions = defaultdict(list)
+    for hashable, action in visits:
+        actions[hashable].append(action)
+    return {k: max(v, key=lambda a: lower_confidence_bound(wins[k, a], visits[k, a])) for k, v in actions.items()}
+
+
+def mirror_table(canonical_table):
+    # Expands a table of build_canonical_table to a table
+    # keyed by GameState.hashable. Only the mirror images
+    # that can occur in a game are kept: the lower-right
+    # corner is blocked from the start and no player ever
+    # stands on it.
+    corner = BitboardGameState().hashable[0]
+    table = {}
+    for key, action in canonical_table.items():
+        for symmetry in BitboardGameState.SYMMETRIES:
+            image = BitboardGameState.transform_hashable(key, symmetry)
+            if image[0] & corner and corner not in (1 << loc for loc in image[1:3] if loc is not None):
+                table[BitboardGameState.gamestate_hashable(image)] = BitboardGameState.transform_action(action, symmetry)
+    return table
+
+
+def build_counts(rounds, seed=None):
+    # Plays the rounds and returns the Counters visits
+    # and wins keyed by (canonical hashable, action)
+    if seed is not None:
+        random.seed(seed)
+    visits = Counter()
+    wins = Counter()
+    for _ in range(rounds):
+        state = BitboardGameState()
+        build_tree(state, visits, wins)
+    return visits, wins
+
+
+def book_counts(visits, wins):
+    """ Return the counts keyed by (hashable, action) as Counters keyed by (state key, action code) """
+    book_visits = Counter()
+    book_wins = Counter()
+    for (hashable, action), count in visits.items():
+        pair = hashable_key(hashable), action_code(action)
+        book_visits[pair] = count
+        book_wins[pair] = wins[hashable, action]
+    return book_visits, book_wins
+
+
+def build_tree(state, visits, wins, depth=2):
     if depth <= 0 or state.terminal_test():
         return -simulate(state)
     action = random.choice(state.actions())
-    reward = build_tree(state.result(action), book, depth - 1)
-    book[state.hashable][action] += reward
+    reward = build_tree(state.result(action), visits, wins, depth - 1)
+    pair = state.canonical_hashable, state.transform_action(action, state.canonical[1])
+    visits[pair] += 1
+    wins[pair] += reward > 0
     return -reward
 
 
@@ -0,0 +1,76 @@
+import random
+import time
+
+import gamestate as game
+import openingbook
+
+
+# Test that utility() reuses the liberty checks instead of
+# calling terminal_test() again -- the "uncached" classes
+# below keep the utility() of the quiz, so every playout of
+# simulate() costs them one more call
+def uncached_utility(self, player_id):
+    if not self.terminal_test(): return 0
+    player_id_is_active = (player_id == self.player())
+    active_has_liberties = self._has_liberties(self.player())
+    active_player_wins = (active_has_liberties == player_id_is_active)
+    return float("inf") if active_player_wins else float("-inf")
+
+
+class UncachedGameState(game.GameState):
+    utility = uncached_utility
+
+
+class UncachedBitboardGameState(game.BitboardGameState):
+    __slots__ = ()
+    utility = uncached_utility
+
+
+def count_calls(state_class, playouts):
+    # call_counter of the random playouts of simulate()
+    random.seed(0)
+    game.call_counter = 0
+    for _ in range(playouts):
+        openingbook.simulate(state_class())
+    return game.call_counter
+
+
+def leaf_time(state_class, leaves=3000, repeats=5):
+    # best time in us of the terminal_test() and utility() check
+    # of a leaf, on the terminal states of random games
+    random.seed(0)
+    terminal_states = []
+    for _ in range(leaves):
+        state = state_class()
+        while not state.terminal_test():
+            state = state.result(random.choice(state.actions()))
+        terminal_states.append(state)
+    best = float("inf")
+    for _ in range(repeats):
+        # forget the liberties GameState cached in the last repeat
+        for state in terminal_states:
+            if hasattr(state, "_can_move"):
+                state._can_move = None
+        start = time.perf_counter()
+        for state in terminal_states:
+            state.terminal_test()
+            state.utility(0)
+        best = min(best, time.perf_counter() - start)
+    return best / leaves * 1e6
+
+
+playouts = 3000
+results = []
+for name, state_class, uncached_class in [("GameState", game.GameState, UncachedGameState),
+                                          ("BitboardGameState", game.BitboardGameState, UncachedBitboardGameState)]:
+    before = count_calls(uncached_class, playouts)
+    after = count_calls(state_class, playouts)
+    print("{}: call_counter of {} playouts before: {}, after: {}".format(name, playouts, before, after))
+    print("{}: time of a leaf check before: {:.2f} us, after: {:.2f} us".format(
+        name, leaf_time(uncached_class), leaf_time(state_class)))
+    results.append(after == before - playouts)
+
+if all(results):
+    print("That's right! utility() no longer repeats the terminal test!")
+else:
+    print("Uh oh...looks like there may be a problem.")
@@ -0,0 +1,36 @@
+
+import random
+
+import openingbook
+from gamestate import GameState, BitboardGameState
+
+
+# build_table has to keep the shape of the quiz table (GameState.hashable
+# -> action) while mirror images share their statistics: play the opening
+# plies of random games and look every position up both in the table and,
+# through its canonical mirror image, in the canonical table
+canonical_table = openingbook.build_canonical_table(10)
+book = openingbook.mirror_table(canonical_table)
+
+checked = mirrored = 0
+problems = []
+for _ in range(200):
+    state, bitboard_state = GameState(), BitboardGameState()
+    for _ in range(2):
+        key, symmetry = bitboard_state.canonical_hashable, bitboard_state.canonical[1]
+        if key in canonical_table:
+            action = bitboard_state.transform_action(canonical_table[key], symmetry)
+            checked += 1
+            mirrored += symmetry != 0
+            if book.get(state.hashable) != action or action not in state.actions():
+                problems.append(state.hashable)
+        elif state.hashable in book:
+            problems.append(state.hashable)
+        action = random.choice(state.actions())
+        state, bitboard_state = state.result(action), bitboard_state.result(action)
+
+print("Positions looked up: {} ({} through a mirror image)".format(checked, mirrored))
+if checked and mirrored and not problems:
+    print("Looks like your book works for mirrored positions!")
+else:
+    print("Uh oh...looks like there may be a problem with {}.".format(problems[:3]))
@@ -0,0 +1,297 @@
+# Persistent opening book: the visits and wins of every (state, action) pair
+# in a file that is memory mapped, so a lookup reads a single 16 byte record
+# and the book never has to be loaded or rebuilt before a game.
+#
+# File layout (little endian):
+#   header  magic b"OBK1", uint32 version, uint64 slot count, uint64 records
+#   slots   records of uint64 key, uint32 visits, uint32 wins
+# The key of a record mixes the 64 bit canonical key of the state (the same for
+# all mirror images of the state) with the action mapped into the orientation
+# of that key; key 0 marks an empty slot. Records are placed by open
+# addressing with linear probing in a power of two number of slots, which is
+# doubled whenever the book gets more than half full.
+
+import hashlib
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+from bitboard import SYMMETRIES, transform_board, transform_offset
+
+_MAGIC = b"OBK1"
+_VERSION = 2
+_HEADER = struct.Struct("<4sIQQ")
+_RECORD = struct.Struct("<QII")
+_MIN_SLOTS = 2 ** 12
+_MAX_LOAD = 0.5
+_KEY_MASK = 2 ** 64 - 1
+# odd 64 bit constant that spreads the action codes over the key
+_ACTION_MIX = 0x9E3779B97F4A7C15
+
+# book of CustomPlayer, built with `python book_builder.py`
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+# plies of a game that are looked up in the book
+BOOK_DEPTH = 4
+# a move is only taken from the book with this many visits
+_MIN_VISITS = 10
+# z value of the lower confidence bound of the win rate
+_LCB_Z = 1.96
+# self-play rounds per task of a parallel book generation
+_SHARD_ROUNDS = 500
+
+
+def hashable_key(hashable):
+    """ Return a 64 bit key of a tuple of ints that is the same in every
+    process (hash() can't be used in a persistent book, it differs between
+    python versions)
+    """
+    return int.from_bytes(hashlib.blake2b(repr(hashable).encode(), digest_size=8).digest(), "little")
+
+
+def canonical_key(state):
+    """ Return (key, symmetry): the book key of the state, the same for all
+    its mirror images, and the symmetry that maps the state onto the image
+    the key belongs to
+
+    Game states with a canonical property (the quiz BitboardGameState) are
+    keyed by their canonical_hashable. Isolation states are keyed by board
+    and locations (the ply count follows from the board), so their images
+    are computed from the bitboard.
+    """
+    if hasattr(state, "canonical"):
+        return hashable_key(state.canonical_hashable), state.canonical[1]
+    keys = [hashable_key((transform_board(state.board, symmetry),
+                          tuple(None if loc is None else image[loc] for loc in state.locs)))
+            for symmetry, image in enumerate(SYMMETRIES)]
+    key = min(keys)
+    return key, keys.index(key)
+
+
+def canonical_action(state, action, symmetry):
+    """ Return the action in the orientation of the canonical key """
+    if hasattr(state, "transform_action"):
+        return state.transform_action(action, symmetry)
+    if state.locs[state.player()] is None:
+        # before the first move of the player an action is the cell it is placed on
+        return SYMMETRIES[symmetry][action]
+    return transform_offset(action, symmetry)
+
+
+def action_code(action):
+    """ Return a non-negative integer for an Isolation action or an (x, y) pair """
+    if isinstance(action, tuple):
+        return 1 + action[0] * 2 ** 16 + action[1]
+    return 1 + int(action) + 2 ** 31
+
+
+def record_key(key, code):
+    """ Return the key of the record of the action with the given code in the state with the given key """
+    return (key ^ code * _ACTION_MIX) & _KEY_MASK or 1
+
+
+def wilson_interval(wins, visits, z=_LCB_Z):
+    """ Return the Wilson score interval (low, high) of the win rate """
+    if not visits:
+        return 0., 1.
+    rate = wins / visits
+    center = rate + z * z / (2 * visits)
+    margin = z * math.sqrt(rate * (1 - rate) / visits + z * z / (4 * visits * visits))
+    return max(0., (center - margin) / (1 + z * z / visits)), min(1., (center + margin) / (1 + z * z / visits))
+
+
+def lower_confidence_bound(wins, visits, z=_LCB_Z):
+    """ Return the lower end of the Wilson score interval of the win rate """
+    return wilson_interval(wins, visits, z)[0]
+
+
+class OpeningBook:
+    """ Memory mapped table of (visits, wins) per (state key, action)
+
+    Open a book read-only for playing (writable=False) or to add the
+    results of new self-play games (writable=True, the file is created if
+    it doesn't exist). A lookup is a hash of the key and, on average, one
+    or two record reads from the mapped file, independent of the book size.
+
+        with OpeningBook(path) as book:
+            action = book_move(book, state)
+    """
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.writable = writable
+        if writable and not os.path.exists(path):
+            self._create(path, _MIN_SLOTS)
+        self._open()
+
+    @staticmethod
+    def _create(path, slots, records=()):
+        """ Write a book with the given (key, visits, wins) records """
+        data = bytearray(_HEADER.size + slots * _RECORD.size)
+        count = 0
+        for key, visits, wins in records:
+            slot = key & (slots - 1)
+            while _RECORD.unpack_from(data, _HEADER.size + slot * _RECORD.size)[0]:
+                slot = (slot + 1) & (slots - 1)
+            _RECORD.pack_into(data, _HEADER.size + slot * _RECORD.size, key, visits, wins)
+            count += 1
+        _HEADER.pack_into(data, 0, _MAGIC, _VERSION, slots, count)
+
+        # write to a temporary file first, so readers never see a half written book
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+    def _open(self):
+        self._file = open(self.path, "r+b" if self.writable else "rb")
+        access = mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ
+        self._map = mmap.mmap(self._file.fileno(), 0, access=access)
+        magic, version, self.slots, self.records = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("{} is not an opening book of version {}".format(self.path, _VERSION))
+        self._mask = self.slots - 1
+
+    def close(self):
+        if self._map is not None:
+            if self.writable:
+                _HEADER.pack_into(self._map, 0, _MAGIC, _VERSION, self.slots, self.records)
+                self._map.flush()
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.records
+
+    def _find(self, key):
+        """ Return the offset of the record of the key or of the empty slot where it belongs """
+        slot = key & self._mask
+        while True:
+            offset = _HEADER.size + slot * _RECORD.size
+            stored = _RECORD.unpack_from(self._map, offset)[0]
+            if stored == key or stored == 0:
+                return offset
+            slot = (slot + 1) & self._mask
+
+    def lookup(self, key, action):
+        """ Return (visits, wins) of the action in the state with the given key """
+        _, visits, wins = _RECORD.unpack_from(self._map, self._find(record_key(key, action_code(action))))
+        return visits, wins
+
+    def select(self, key, actions, min_visits=_MIN_VISITS):
+        """ Return the action with the highest lower confidence bound of its
+        win rate among the actions visited at least min_visits times, or
+        None if the book doesn't know the state well enough
+
+        The actions have to be in the orientation of the key, book_move()
+        maps them for a game state.
+        """
+        best_action = None
+        best_bound = float("-inf")
+        for action in actions:
+            visits, wins = self.lookup(key, action)
+            if visits < min_visits:
+                continue
+            bound = lower_confidence_bound(wins, visits)
+            if bound > best_bound:
+                best_bound, best_action = bound, action
+        return best_action
+
+    def _records(self):
+        for slot in range(self.slots):
+            record = _RECORD.unpack_from(self._map, _HEADER.size + slot * _RECORD.size)
+            if record[0]:
+                yield record
+
+    def _grow(self):
+        records = list(self._records())
+        self.close()
+        self._create(self.path, self.slots * 2, records)
+        self._open()
+
+    def update(self, visits, wins):
+        """ Add the counts of new games: visits and wins are Counters keyed
+        by (state key, action code), see book_builder.self_play()
+        """
+        if not self.writable:
+            raise ValueError("The opening book was opened read-only")
+        for pair, count in visits.items():
+            if self.records + 1 > self.slots * _MAX_LOAD:
+                self._grow()
+            key = record_key(*pair)
+            offset = self._find(key)
+            stored, old_visits, old_wins = _RECORD.unpack_from(self._map, offset)
+            if not stored:
+                self.records += 1
+            _RECORD.pack_into(self._map, offset, key, old_visits + count, old_wins + wins[pair])
+
+
+def book_move(book, state, min_visits=_MIN_VISITS):
+    """ Return the book move of the state or None, see OpeningBook.select() """
+    key, symmetry = canonical_key(state)
+    actions = {canonical_action(state, action, symmetry): action for action in state.actions()}
+    best = book.select(key, actions, min_visits)
+    return None if best is None else actions[best]
+
+
+def _play_shard(args):
+    worker, rounds, seed = args
+    return worker(rounds=rounds, seed=seed)
+
+
+def print_progress(done, total, seconds):
+    """ Report the progress of parallel_counts() on one line of stderr """
+    sys.stderr.write("\r{}/{} rounds, {:.0f} rounds/s".format(done, total, done / max(seconds, 1e-6)))
+    if done == total:
+        sys.stderr.write("\n")
+
+
+def parallel_counts(worker, rounds, processes=None, seed=None, shard_rounds=_SHARD_ROUNDS, report=None):
+    """ Play self-play rounds in shards on a process pool and return the
+    merged Counters (visits, wins)
+
+    worker(rounds=n, seed=s) plays n rounds with its own random seed s and
+    returns Counters (visits, wins); it has to be a module level function
+    (or a functools.partial of one) so that it can be sent to the pool.
+    Shard i gets seed + i, so a generation with a fixed seed is
+    reproducible whatever the number of processes. After every shard
+    report(rounds done, rounds, seconds) is called, see print_progress().
+    processes=1 plays all shards in this process.
+    """
+    if seed is None:
+        # the forked workers would all continue with the same random state
+        seed = random.randrange(2 ** 32)
+    shards = [(worker, min(shard_rounds, rounds - start), seed + index)
+              for index, start in enumerate(range(0, rounds, shard_rounds))]
+    visits = Counter()
+    wins = Counter()
+    done = 0
+    start_time = time.perf_counter()
+
+    def merge(results):
+        nonlocal done
+        for (_, shard_rounds, _), (shard_visits, shard_wins) in zip(shards, results):
+            visits.update(shard_visits)
+            wins.update(shard_wins)
+            done += shard_rounds
+            if report is not None:
+                report(done, rounds, time.perf_counter() - start_time)
+
+    if processes == 1:
+        merge(map(_play_shard, shards))
+    else:
+        with Pool(processes) as pool:
+            merge(pool.imap(_play_shard, shards))
+    return visits, wins
@@ -0,0 +1,54 @@
+import random
+
+from bitboard import MOVES, MOVE_MASKS, popcount
+
+# (destination, bit of the destination) of every knight move per cell
+_MOVE_BITS = tuple(tuple((target, 1 << target) for target in targets) for targets in MOVES)
+
+
+def playout(board, locs, player, biased=False, played=None):
+    """ Play a game to the end from the position given by the bitboard of
+    open cells, the cells of both players and the id of the active player,
+    and return the id of the winner
+
+    The playout works on plain integers and the precomputed move tables
+    instead of creating a new Isolation state per ply. A random move is
+    drawn by rejection sampling from the fixed move list of the cell, so no
+    list of legal moves is built either. With biased=True two random moves
+    are drawn and the one leaving the mover more onward moves is played.
+    The terminal rule matches Isolation.utility(): the game ends as soon as
+    either player has no liberties, and the active player wins if it can
+    still move; a lone liberty at cell 0 counts as none, as in
+    Isolation._has_liberties(). If a list is passed as played, the destination cell of every
+    move is appended to it (the first one by the given active player).
+    """
+    own, opp = locs[player], locs[1 - player]
+    uniform = random.random
+
+    while True:
+        # a move mask of 1 is a lone liberty at cell 0
+        own_moves = board & MOVE_MASKS[own]
+        if own_moves <= 1:
+            return 1 - player
+        if board & MOVE_MASKS[opp] <= 1:
+            return player
+
+        moves = _MOVE_BITS[own]
+        while True:
+            target, bit = moves[int(uniform() * len(moves))]
+            if own_moves & bit:
+                break
+
+        if biased and own_moves & (own_moves - 1):
+            while True:
+                other_target, other_bit = moves[int(uniform() * len(moves))]
+                if own_moves & other_bit:
+                    break
+            if popcount(board & MOVE_MASKS[other_target]) > popcount(board & MOVE_MASKS[target]):
+                target, bit = other_target, other_bit
+
+        board ^= bit
+        if played is not None:
+            played.append(target)
+        own, opp = opp, target
+        player = 1 - player
@@ -0,0 +1,245 @@
+# Bitboard game state of queens Isolation on the 3x2 board of the search quizzes.
+#
+# BitboardGameState has the interface of the GameState classes in the quiz
+# directories (actions, result, terminal_test, utility, liberties and the
+# same order of the actions), so the quiz searches run on it unchanged. The
+# quiz gamestate modules subclass it to count the terminal_test() calls in
+# their call_counter, use those subclasses rather than this class directly.
+
+import random
+
+from bitboard import popcount
+
+xlim, ylim = 3, 2  # board dimensions
+
+# The eight movement directions possible for a chess queen
+RAYS = [(1, 0), (1, -1), (0, -1), (-1, -1),
+        (-1, 0), (-1, 1), (0, 1), (1, 1)]
+
+# Cells are numbered x + y * xlim (the same order as GameState._get_blank_spaces)
+# and a set bit marks a blocked cell, just like a 1 in GameState._board.
+
+_CELLS = [(x, y) for y in range(ylim) for x in range(xlim)]
+_INDEX = {xy: i for i, xy in enumerate(_CELLS)}
+
+
+def _ray(cell, dx, dy):
+    """ Return the cells in a straight line from cell (exclusive) to the border """
+    x, y = _CELLS[cell]
+    cells = []
+    while 0 <= x + dx < xlim and 0 <= y + dy < ylim:
+        x, y = x + dx, y + dy
+        cells.append((x, y))
+    return cells
+
+
+def _ray_table(cell):
+    # (mask of the ray, True if the ray runs towards higher cell numbers,
+    #  cells of the ray in walking order) for every direction in RAYS
+    table = []
+    for dx, dy in RAYS:
+        cells = _ray(cell, dx, dy)
+        if cells:
+            mask = sum(1 << _INDEX[xy] for xy in cells)
+            table.append((mask, dx + dy * xlim > 0, tuple(cells)))
+    return table
+
+
+_RAY_TABLE = [_ray_table(cell) for cell in range(len(_CELLS))]
+_NEIGHBORS = [sum(1 << _INDEX[cells[0]] for _, _, cells in rays) for rays in _RAY_TABLE]
+
+# fixed seed so that hashes are stable between runs and processes
+_zobrist_random = random.Random(0)
+_ZOBRIST_BLOCKED = [_zobrist_random.getrandbits(64) for _ in _CELLS]
+_ZOBRIST_LOCATION = [[_zobrist_random.getrandbits(64) for _ in _CELLS] for _ in range(2)]
+_ZOBRIST_PARITY = _zobrist_random.getrandbits(64)
+
+# the mirror images of a rectangular board: identity, flip left-right,
+# flip top-bottom and rotation by 180 degrees; each one is its own inverse
+_SYMMETRIES = [[_INDEX[(x, y)] for x, y in _CELLS],
+               [_INDEX[(xlim - 1 - x, y)] for x, y in _CELLS],
+               [_INDEX[(x, ylim - 1 - y)] for x, y in _CELLS],
+               [_INDEX[(xlim - 1 - x, ylim - 1 - y)] for x, y in _CELLS]]
+# Zobrist keys of the mirror images: blocking cell c in a state blocks cell
+# _SYMMETRIES[s][c] in its image s
+_SYMMETRIC_BLOCKED = [[_ZOBRIST_BLOCKED[image] for image in symmetry] for symmetry in _SYMMETRIES]
+_SYMMETRIC_LOCATION = [[[_ZOBRIST_LOCATION[player][image] for image in symmetry] for symmetry in _SYMMETRIES]
+                       for player in range(2)]
+
+
+class BitboardGameState:
+    """ Drop-in replacement for GameState backed by a bitboard
+
+    result() builds the next state from a handful of integers instead of
+    deep copying the board, liberties are found with precomputed ray masks
+    and the Zobrist hash of the state is updated incrementally.
+
+    The hashes of the mirror images of the state are updated along with
+    it, so the canonical key of the state (the same for all its mirror
+    images) is the minimum of four integers; store moves under
+    canonical_hashable and map them with transform_action() to share them
+    between symmetric positions.
+
+    Attributes
+    ----------
+    _blocked: int
+        Bitboard with bit x + y * xlim set for every closed cell
+
+    _parity: bool
+        Keep track of active player initiative (see GameState)
+
+    _locs: tuple(int)
+        Cell number of each player, or None before its first move
+
+    zobrist: int
+        64 bit Zobrist hash of the state, also used by __hash__
+
+    _zobrists: tuple(int)
+        Zobrist hash of the image of the state under every symmetry
+        (the first one is the identity, so it equals zobrist)
+    """
+    __slots__ = ("_blocked", "_parity", "_locs", "zobrist", "_zobrists")
+
+    # the symmetry numbers understood by transform_action and transform_hashable
+    SYMMETRIES = range(len(_SYMMETRIES))
+
+    def __init__(self):
+        corner = _INDEX[(xlim - 1, ylim - 1)]
+        self._blocked = 1 << corner  # block lower-right corner
+        self._parity = 0
+        self._locs = (None, None)
+        self._zobrists = tuple(blocked[corner] for blocked in _SYMMETRIC_BLOCKED)
+        self.zobrist = self._zobrists[0]
+
+    @property
+    def _player_locations(self):
+        return [None if loc is None else _CELLS[loc] for loc in self._locs]
+
+    @property
+    def hashable(self):
+        return (self._blocked,) + self._locs + (self._parity,)
+
+    @property
+    def canonical(self):
+        """ Return (key, symmetry): the smallest hash of the mirror images
+        of the state and the symmetry that maps the state to that image
+        """
+        key = min(self._zobrists)
+        return key, self._zobrists.index(key)
+
+    @property
+    def canonical_hashable(self):
+        """ Return the hashable of the mirror image with the canonical key """
+        return BitboardGameState.transform_hashable(self.hashable, self.canonical[1])
+
+    @staticmethod
+    def transform_action(action, symmetry):
+        """ Map an action to the mirror image (or back, the symmetries are their own inverse) """
+        return _CELLS[_SYMMETRIES[symmetry][_INDEX[action]]]
+
+    @staticmethod
+    def transform_hashable(hashable, symmetry):
+        """ Map a hashable to the hashable of the mirror image (or back) """
+        image = _SYMMETRIES[symmetry]
+        blocked = sum(1 << image[cell] for cell in range(len(_CELLS)) if hashable[0] >> cell & 1)
+        locs = tuple(None if loc is None else image[loc] for loc in hashable[1:3])
+        return (blocked,) + locs + (hashable[3],)
+
+    @staticmethod
+    def gamestate_hashable(hashable):
+        """ Return the GameState.hashable of the position with this hashable """
+        board = tuple(hashable[0] >> _INDEX[(x, y)] & 1 for x in range(xlim) for y in range(ylim))
+        locs = tuple(None if loc is None else _CELLS[loc] for loc in hashable[1:3])
+        return board + locs + (hashable[3],)
+
+    def __hash__(self):
+        return self.zobrist
+
+    def __eq__(self, other):
+        return isinstance(other, BitboardGameState) and self.hashable == other.hashable
+
+    def actions(self):
+        """ Return a list of legal actions for the active player """
+        return self._liberties(self._locs[self._parity])
+
+    def player(self):
+        """ Return the id of the active player """
+        return self._parity
+
+    def result(self, action):
+        """ Return a new state that results from applying the given
+        action in the current state
+        """
+        assert action in self.actions(), "Attempted forecast of illegal move"
+        cell = _INDEX[action]
+        previous = self._locs[self._parity]
+        location = _SYMMETRIC_LOCATION[self._parity]
+        zobrists = []
+        for symmetry, zobrist in enumerate(self._zobrists):
+            zobrist ^= _SYMMETRIC_BLOCKED[symmetry][cell] ^ location[symmetry][cell] ^ _ZOBRIST_PARITY
+            if previous is not None:
+                zobrist ^= location[symmetry][previous]
+            zobrists.append(zobrist)
+
+        newBoard = object.__new__(type(self))
+        newBoard._blocked = self._blocked | (1 << cell)
+        newBoard._parity = self._parity ^ 1
+        newBoard._locs = (cell, self._locs[1]) if self._parity == 0 else (self._locs[0], cell)
+        newBoard._zobrists = tuple(zobrists)
+        newBoard.zobrist = zobrists[0]
+        return newBoard
+
+    def terminal_test(self):
+        """ return True if the current state is terminal,
+        and False otherwise (see GameState.terminal_test)
+        """
+        return (not self._has_liberties(self._parity)
+                or not self._has_liberties(1 - self._parity))
+
+    def utility(self, player_id):
+        """ return +inf if the game is terminal and the
+        specified player wins, return -inf if the game
+        is terminal and the specified player loses, and
+        return 0 if the game is not terminal
+        """
+        # calls terminal_test() like the quiz GameState so that both classes
+        # count the same nodes; the liberty checks are single mask tests
+        if not self.terminal_test(): return 0
+        player_id_is_active = (player_id == self.player())
+        active_has_liberties = self._has_liberties(self.player())
+        active_player_wins = (active_has_liberties == player_id_is_active)
+        return float("inf") if active_player_wins else float("-inf")
+
+    def liberties(self, loc):
+        """ Return a list of all open cells in the
+        neighborhood of the specified location (see GameState.liberties)
+        """
+        return self._liberties(None if loc is None else _INDEX[loc])
+
+    def _liberties(self, cell):
+        if cell is None: return self._get_blank_spaces()
+        blocked = self._blocked
+        moves = []
+        for mask, ascending, cells in _RAY_TABLE[cell]:
+            blockers = mask & blocked
+            if not blockers:
+                moves.extend(cells)
+                continue
+            # the open cells of a ray are the ones before the first blocker
+            if ascending:
+                open_cells = mask & ((blockers & -blockers) - 1)
+            else:
+                open_cells = mask & ~((1 << blockers.bit_length()) - 1)
+            moves.extend(cells[:popcount(open_cells)])
+        return moves
+
+    def _has_liberties(self, player_id):
+        """ Check to see if the specified player has any liberties """
+        cell = self._locs[player_id]
+        if cell is None: return any(self._get_blank_spaces())
+        # a player can move if any cell next to it is open
+        return bool(_NEIGHBORS[cell] & ~self._blocked)
+
+    def _get_blank_spaces(self):
+        """ Return a list of blank spaces on the board."""
+        return [xy for i, xy in enumerate(_CELLS) if not self._blocked & (1 << i)]
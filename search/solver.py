@@ -0,0 +1,81 @@
+# Exact solver for the small boards of the search exercises.
+#
+# Isolation has no draws and no repeated positions (every move closes a
+# cell), so the states reachable from a position form a DAG that is small
+# enough to walk completely on boards like the 3x2 quiz board. The solver
+# visits every reachable state once, in post order, and stores its exact game
+# value and best move; afterwards every minimax call on a solved state is a
+# dictionary lookup.
+
+
+def exact_state_key(gameState):
+    """ Return an exact key of the position (no hash collisions are allowed
+    in a table of game values)
+    """
+    if hasattr(gameState, "hashable"):  # BitboardGameState
+        return gameState.hashable
+    return (tuple(map(tuple, gameState._board)), tuple(gameState._player_locations), gameState._parity)
+
+
+class SolvedGame:
+    """ Table of the exact value of every state reachable from a root state
+
+    Values are from the point of view of player_id, as returned by
+    utility(player_id): +inf if that player wins with perfect play of both
+    sides, -inf if it loses. States that were not reachable from the roots
+    solved so far are solved on demand.
+
+        solution = SolvedGame(gamestate.GameState())
+        value = solution.value(state)
+        action = solution.best_action(state)
+    """
+
+    def __init__(self, root=None, player_id=0):
+        self.player_id = player_id
+        self._values = {}
+        self._moves = {}
+        if root is not None:
+            self.solve(root)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, gameState):
+        return exact_state_key(gameState) in self._values
+
+    def solve(self, gameState):
+        """ Solve all states reachable from the state and return its value """
+        key = exact_state_key(gameState)
+        value = self._values.get(key)
+        if value is not None:
+            return value
+
+        best_move = None
+        if gameState.terminal_test():
+            value = gameState.utility(self.player_id)
+        else:
+            maximize = gameState.player() == self.player_id
+            # no cutoff after a winning move: every child is solved, so the
+            # table covers all reachable states
+            for a in gameState.actions():
+                child_value = self.solve(gameState.result(a))
+                if best_move is None or (child_value > value if maximize else child_value < value):
+                    value, best_move = child_value, a
+
+        self._values[key] = value
+        self._moves[key] = best_move
+        return value
+
+    def value(self, gameState):
+        """ Return the exact value of the state for player_id """
+        value = self._values.get(exact_state_key(gameState))
+        return self.solve(gameState) if value is None else value
+
+    def best_action(self, gameState):
+        """ Return a move with the best exact value for the player to move,
+        or None in a terminal state
+        """
+        key = exact_state_key(gameState)
+        if key not in self._moves:
+            self.solve(gameState)
+        return self._moves[key]
@@ -0,0 +1,62 @@
+import random
+
+from isolation import Isolation
+
+from bitboard import popcount
+from endgame import EndgameSolver, separated
+
+# separated position of a random game in which the player to move loses
+# because its longest path would have to continue from a knight whose only
+# liberty is cell 0, which Isolation counts as no liberty at all
+_CELL_ZERO_POSITION = Isolation(board=20711259590119795184487009490077201, ply_count=69, locs=(20, 19))
+
+
+def exact_value(state, memo):
+    """ Return the value of the state for the player to move by a full minimax search """
+    value = memo.get(state)
+    if value is not None:
+        return value
+    if state.terminal_test():
+        value = state.utility(state.player())
+    else:
+        value = float("-inf")
+        for action in state.actions():
+            value = max(value, -exact_value(state.result(action), memo))
+            if value == float("inf"):
+                break
+    memo[state] = value
+    return value
+
+
+def separated_positions(count, max_open_cells, seed):
+    """ Return the first separated position of random games, only positions
+    small enough for exact_value() in which cell 0 is part of a region
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = Isolation()
+        while not state.terminal_test():
+            regions = None
+            if None not in state.locs and popcount(state.board) <= max_open_cells:
+                regions = separated(state.board, state.locs)
+            if regions is not None:
+                if any(region & 1 for region in regions):
+                    positions.append(state)
+                break
+            state = state.result(rng.choice(state.actions()))
+    return positions
+
+
+def test_cell_zero_is_no_liberty():
+    value, _ = EndgameSolver().solve(_CELL_ZERO_POSITION)
+    assert value == exact_value(_CELL_ZERO_POSITION, {}) == float("-inf")
+
+
+def test_solve_matches_minimax():
+    solver = EndgameSolver(max_nodes=10 ** 6)
+    for state in separated_positions(60, 26, seed=0):
+        value, action = solver.solve(state)
+        assert value == exact_value(state, {}), state
+        if value == float("inf"):
+            assert exact_value(state.result(action), {}) == float("-inf"), state
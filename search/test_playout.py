@@ -0,0 +1,40 @@
+import random
+
+from isolation import Isolation
+
+from playout import playout
+
+# terminal position: the only liberty of player 0 (to move) at cell 27 is
+# cell 0, which Isolation counts as no liberty, so player 0 has lost
+_CELL_ZERO_POSITION = Isolation(board=1 | 1 << 5 | 1 << 15, ply_count=10, locs=(27, 60))
+
+
+def winner(state):
+    """ Return the id of the winner of a terminal state """
+    return 0 if state.utility(0) > 0 else 1
+
+
+def test_cell_zero_is_no_liberty():
+    state = _CELL_ZERO_POSITION
+    assert state.terminal_test()
+    assert playout(state.board, state.locs, state.player()) == winner(state) == 1
+
+
+def test_playout_ends_like_isolation():
+    rng = random.Random(0)
+    for _ in range(200):
+        state = Isolation()
+        while not state.terminal_test():
+            if None not in state.locs and rng.random() < 0.1:
+                break
+            state = state.result(rng.choice(state.actions()))
+        if None in state.locs:
+            continue
+        # the playout of a state reaches a terminal state whose winner Isolation agrees on
+        played = []
+        result = playout(state.board, state.locs, state.player(), played=played)
+        for cell in played:
+            loc = state.locs[state.player()]
+            state = state.result(cell - loc)
+        assert state.terminal_test()
+        assert result == winner(state)
@@ -0,0 +1,295 @@
+import argparse
+import itertools
+import json
+import os
+import pickle
+import random
+import time
+import traceback
+from multiprocessing import Pool
+
+from isolation import Isolation
+from sample_players import GreedyPlayer, MinimaxPlayer, RandomPlayer
+from my_custom_player import CustomPlayer
+from opening_book import wilson_interval
+
+# time limit for a move in ms, as in the project's run_match.py
+_TIME_LIMIT = 150
+_GAMES = 20
+
+_PLAYERS = {
+    "random": RandomPlayer,
+    "greedy": GreedyPlayer,
+    "minimax": MinimaxPlayer,
+    "custom": CustomPlayer,
+}
+
+
+class MoveQueue:
+    """ Stand-in for the queue of the game harness that keeps the last move put """
+
+    def __init__(self):
+        self.action = None
+        self.moves_put = 0
+
+    def put(self, item, block=True, timeout=None):
+        self.action = item
+        self.moves_put += 1
+
+    put_nowait = put
+
+
+def parse_agent(spec):
+    """ Split an agent spec like "custom:algorithm=mcts,evaluator=own_center"
+    into the player name and the keyword arguments of its constructor
+    """
+    name, _, arguments = spec.partition(":")
+    if name not in _PLAYERS:
+        raise ValueError("Unknown agent {!r}, choose from {}".format(name, ", ".join(sorted(_PLAYERS))))
+    kwargs = {}
+    for argument in filter(None, arguments.split(",")):
+        key, _, value = argument.partition("=")
+        kwargs[key.strip()] = value.strip()
+    return name, kwargs
+
+
+def starts_processes(spec):
+    """ Return True if the agent starts processes of its own (a pool or a
+    pondering process), which a worker of the tournament's pool can't
+    """
+    name, kwargs = parse_agent(spec)
+    player_class = _PLAYERS[name]
+    return hasattr(player_class, "starts_processes") and player_class.starts_processes(**kwargs)
+
+
+def make_player(spec, player_id, time_limit=_TIME_LIMIT):
+    name, kwargs = parse_agent(spec)
+    player = _PLAYERS[name](player_id, **kwargs)
+    if hasattr(player, "time_limit"):
+        player.time_limit = time_limit
+    return player
+
+
+def timed_get_action(player, state):
+    """ Call get_action() with a fresh queue and return the last move put,
+    the time taken in ms and the search stats of the player
+    """
+    player.queue = MoveQueue()
+    start_time = time.perf_counter()
+    player.get_action(state)
+    milliseconds = 1000 * (time.perf_counter() - start_time)
+    stats = player.search_stats() if hasattr(player, "search_stats") else {}
+    return player.queue.action, milliseconds, stats
+
+
+def forked_get_action(player, state):
+    """ Run timed_get_action() in a forked process, like the harness does
+
+    Only the results and player.context come back to this process, every
+    other change the move makes to the player is lost. The player is
+    closed in the child, which shuts down the pools it started there.
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        result = (None, 0., {}), None
+        try:
+            result = timed_get_action(player, state), getattr(player, "context", None)
+            if hasattr(player, "close"):
+                player.close()
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            with os.fdopen(write_end, "wb") as f:
+                pickle.dump(result, f)
+            os._exit(0)
+
+    os.close(write_end)
+    with os.fdopen(read_end, "rb") as f:
+        result, context = pickle.load(f)
+    os.waitpid(pid, 0)
+    player.context = context
+    return result
+
+
+def play_game(job):
+    """ Play one game in this process and return its record
+
+    job is a tuple (game index, seed, (spec of player 0, spec of player 1),
+    time limit in ms, fork). A move that takes longer than the time limit
+    is counted as a violation but still played, a player that puts no legal
+    move loses the game.
+
+    With fork=False the players are called in-process one after the other,
+    so everything a player keeps in its attributes (tables, trees, pools)
+    carries over to its next move. The harness instead runs every move in
+    a new process and only player.context carries over; fork=True does the
+    same.
+
+    A player that ponders (custom:ponder=1) searches in a process of its own
+    at the lowest priority while its opponent is timed. With fork=True the
+    pondering process ends with the process of the move that started it, so
+    it never runs on the opponent's time.
+    """
+    index, seed, specs, time_limit, fork = job
+    random.seed(seed)
+    players = [make_player(spec, player_id, time_limit) for player_id, spec in enumerate(specs)]
+    moves = [[], []]
+    forfeit = None
+
+    state = Isolation()
+    while not state.terminal_test():
+        player_id = state.player()
+        player = players[player_id]
+        if fork:
+            action, milliseconds, stats = forked_get_action(player, state)
+        else:
+            action, milliseconds, stats = timed_get_action(player, state)
+
+        move = {"ms": milliseconds, "violation": milliseconds > time_limit}
+        # moves that were not searched (openings, book moves) report no nodes
+        if stats.get("nodes"):
+            move.update(nodes=stats["nodes"], nodes_per_second=stats["nodes_per_second"], depth=stats["depth"])
+        moves[player_id].append(move)
+
+        if action not in state.actions():
+            forfeit = player_id
+            break
+        state = state.result(action)
+
+    for player in players:
+        if hasattr(player, "close"):
+            player.close()
+
+    if forfeit is not None:
+        winner = 1 - forfeit
+    else:
+        winner = 0 if state.utility(0) > 0 else 1
+    return {"game": index, "seed": seed, "agents": list(specs), "winner": winner, "forfeit": forfeit,
+            "plies": state.ply_count, "moves": moves}
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0.
+
+
+def summarize(records, agents):
+    """ Return the results of every agent over all games it played """
+    summary = {}
+    for label in agents:
+        games = wins = forfeits = 0
+        moves = []
+        for record in records:
+            for player_id in (0, 1):
+                if record["agents"][player_id] != label:
+                    continue
+                games += 1
+                wins += record["winner"] == player_id
+                forfeits += record["forfeit"] == player_id
+                moves.extend(record["moves"][player_id])
+
+        searched = [move for move in moves if "nodes" in move]
+        low, high = wilson_interval(wins, games)
+        summary[label] = {
+            "games": games,
+            "wins": wins,
+            "win_rate": wins / games if games else 0.,
+            "win_rate_ci_95": [low, high],
+            "moves": len(moves),
+            "mean_move_ms": _mean([move["ms"] for move in moves]),
+            "max_move_ms": max((move["ms"] for move in moves), default=0.),
+            "time_violations": sum(move["violation"] for move in moves),
+            "forfeits": forfeits,
+            "searched_moves": len(searched),
+            "mean_nodes": _mean([move["nodes"] for move in searched]),
+            "mean_nodes_per_second": _mean([move["nodes_per_second"] for move in searched]),
+            "mean_depth": _mean([move["depth"] for move in searched]),
+            "max_depth": max((move["depth"] for move in searched), default=0),
+        }
+    return summary
+
+
+def make_jobs(agents, games, seed, time_limit, fork=False):
+    """ Return the games of a round robin between the agents; the seats are
+    swapped every other game, so each agent moves first in half of its games
+    """
+    jobs = []
+    for first, second in itertools.combinations(agents, 2):
+        for game in range(games):
+            specs = (first, second) if game % 2 == 0 else (second, first)
+            jobs.append((len(jobs), seed + len(jobs), specs, time_limit, fork))
+    return jobs
+
+
+def run_tournament(agents, games=_GAMES, processes=1, seed=0, time_limit=_TIME_LIMIT, fork=False):
+    """ Play games games between every pair of agents and return the
+    summary per agent together with the records of all games
+
+    processes > 1 spreads the games over a process pool. Every game has
+    its own fixed seed, so its random choices do not depend on the number
+    of processes (searches with a time limit can still differ). Agents
+    that start processes of their own (custom with algorithm=mcts_root,
+    mcts_leaf or ponder=1) need processes=1, otherwise a ValueError is
+    raised before any game is played. fork=True runs every move in its own
+    process like the harness, see play_game().
+    """
+    if len(set(agents)) != len(agents) or len(agents) < 2:
+        raise ValueError("A tournament needs at least two different agent specs")
+    for spec in agents:
+        if starts_processes(spec) and processes > 1:
+            raise ValueError("Agent {!r} starts processes of its own, run it with processes=1".format(spec))
+
+    jobs = make_jobs(agents, games, seed, time_limit, fork)
+    start_time = time.perf_counter()
+    if processes > 1:
+        with Pool(processes) as pool:
+            records = sorted(pool.imap_unordered(play_game, jobs), key=lambda record: record["game"])
+    else:
+        records = [play_game(job) for job in jobs]
+
+    return {
+        "agents": summarize(records, agents),
+        "games": len(records),
+        "seed": seed,
+        "time_limit_ms": time_limit,
+        "processes": processes,
+        "fork": fork,
+        "seconds": time.perf_counter() - start_time,
+        "records": records,
+    }
+
+
+def format_summary(results):
+    lines = ["{:<40} {:>6} {:>16} {:>10} {:>10} {:>6} {:>10}".format(
+        "agent", "win %", "95% ci", "nodes", "nodes/s", "depth", "violations")]
+    for label, stats in results["agents"].items():
+        low, high = stats["win_rate_ci_95"]
+        lines.append("{:<40} {:>6.1f} {:>7.1f} - {:>5.1f} {:>10.0f} {:>10.0f} {:>6.1f} {:>10}".format(
+            label, 100 * stats["win_rate"], 100 * low, 100 * high, stats["mean_nodes"],
+            stats["mean_nodes_per_second"], stats["mean_depth"], stats["time_violations"]))
+    lines.append("{} games in {:.1f}s".format(results["games"], results["seconds"]))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play a round robin tournament between Isolation agents")
+    parser.add_argument("agents", nargs="+",
+                        help="agent specs like greedy, minimax or custom:algorithm=mcts,evaluator=own_center")
+    parser.add_argument("-n", "--games", type=int, default=_GAMES, help="games per pair of agents")
+    parser.add_argument("-p", "--processes", type=int, default=1)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-t", "--time-limit", type=int, default=_TIME_LIMIT, help="ms per move")
+    parser.add_argument("-f", "--fork", action="store_true",
+                        help="run every move in a forked process like the harness, only self.context carries over")
+    parser.add_argument("-o", "--output", help="write the summary and all game records as JSON to this file")
+    args = parser.parse_args()
+
+    try:
+        results = run_tournament(args.agents, args.games, args.processes, args.seed, args.time_limit, args.fork)
+    except ValueError as error:
+        parser.error(str(error))
+    print(format_summary(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
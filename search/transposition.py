@@ -0,0 +1,148 @@
+from collections import namedtuple
+
+# bound types of a stored value
+EXACT = 0
+LOWER_BOUND = 1  # the search failed high, the true value is >= value
+UPPER_BOUND = 2  # the search failed low, the true value is <= value
+
+Entry = namedtuple("Entry", ["key", "depth", "bound", "value", "move", "generation"])
+
+
+def bound_type(value, alpha, beta):
+    """ Return the bound type of a value found with the window (alpha, beta) """
+    if value <= alpha:
+        return UPPER_BOUND
+    if value >= beta:
+        return LOWER_BOUND
+    return EXACT
+
+
+class TranspositionTable:
+    """ Fixed size cache of alpha-beta search results keyed by a state hash
+
+    The table has a fixed number of slots (a power of two, the state hash
+    selects the slot), so its memory use never grows during a game; with the
+    tuples stored per slot the budget is roughly 150 bytes per entry. When
+    two states share a slot the entry of the deeper search is kept, unless
+    it stems from an older search (see new_search()) or the same state is
+    stored again.
+
+    Usage in a min/max search:
+
+        value, alpha, beta, move = table.probe(key, depth, alpha, beta)
+        if value is not None:
+            return value
+        ... search the children, trying move first ...
+        table.store(key, depth, v, alpha, beta, best_move)
+    """
+
+    def __init__(self, size=2 ** 16):
+        # round down to a power of two so the slot is a cheap bit mask
+        self.size = 1 << (max(1, size).bit_length() - 1)
+        self._mask = self.size - 1
+        self._slots = [None] * self.size
+        self._generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejections = 0
+        # a list that store() appends every stored key to, see entries()
+        self.journal = None
+
+    def new_search(self):
+        """ Mark all current entries as stale, so they are replaced first """
+        self._generation += 1
+
+    def clear(self):
+        self._slots = [None] * self.size
+
+    def lookup(self, key):
+        """ Return the Entry stored for the key or None """
+        self.probes += 1
+        entry = self._slots[key & self._mask]
+        if entry is None or entry.key != key:
+            return None
+        self.hits += 1
+        return entry
+
+    def probe(self, key, depth, alpha, beta):
+        """ Look up the key and narrow the (alpha, beta) window with the stored bound
+
+        Return a tuple (value, alpha, beta, move). The value is not None if
+        the stored result is deep enough to decide the node without a search;
+        move is the best move stored for the state (or None) and should be
+        searched first.
+        """
+        entry = self.lookup(key)
+        if entry is None:
+            return None, alpha, beta, None
+
+        if entry.depth >= depth:
+            if entry.bound == EXACT:
+                self.cutoffs += 1
+                return entry.value, alpha, beta, entry.move
+            if entry.bound == LOWER_BOUND:
+                alpha = max(alpha, entry.value)
+            else:
+                beta = min(beta, entry.value)
+            if alpha >= beta:
+                self.cutoffs += 1
+                return entry.value, alpha, beta, entry.move
+
+        return None, alpha, beta, entry.move
+
+    def store(self, key, depth, value, alpha, beta, move=None):
+        """ Store the value of a search of the given depth with the window (alpha, beta) """
+        index = key & self._mask
+        current = self._slots[index]
+        if current is not None and current.key != key:
+            if current.generation == self._generation and current.depth > depth:
+                self.rejections += 1
+                return
+            self.replacements += 1
+
+        self.stores += 1
+        self._slots[index] = Entry(key, depth, bound_type(value, alpha, beta), value, move, self._generation)
+        if self.journal is not None:
+            self.journal.append(key)
+
+    def entries(self, keys, min_depth=0):
+        """ Return the entries still stored for the keys that were searched at least min_depth deep """
+        entries = []
+        for key in set(keys):
+            entry = self._slots[key & self._mask]
+            if entry is not None and entry.key == key and entry.depth >= min_depth:
+                entries.append(entry)
+        return entries
+
+    def merge(self, entries):
+        """ Store the entries of another table, like store() keeps the deeper
+        entry of the current search when two states share a slot
+        """
+        for entry in entries:
+            index = entry.key & self._mask
+            current = self._slots[index]
+            if current is not None and current.generation == self._generation and current.depth > entry.depth:
+                self.rejections += 1
+                continue
+            self.stores += 1
+            self._slots[index] = entry._replace(generation=self._generation)
+
+    def __len__(self):
+        return sum(entry is not None for entry in self._slots)
+
+    def stats(self):
+        """ Return the hit and cutoff statistics of the table """
+        return {
+            "size": self.size,
+            "entries": len(self),
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.probes if self.probes else 0.,
+            "cutoffs": self.cutoffs,
+            "stores": self.stores,
+            "replacements": self.replacements,
+            "rejections": self.rejections,
+        }